@@ -0,0 +1,35 @@
+# benchmarks/_bench_config.py
+#
+# Lets a benchmark run without touching the user's caches and settings, and
+# on machines without a config.py (CI): the real config (or config_example.py)
+# is copied into a fresh `config` module with the given overrides.
+
+import os
+import sys
+import types
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def install_config(**overrides):
+    """
+    Install a `config` module with overrides applied. Must be called before
+    anything from utils/ is imported, since those modules copy their settings
+    at import time.
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    config_path = os.path.join(ROOT, "config.py")
+    if not os.path.exists(config_path):
+        config_path = os.path.join(ROOT, "config_example.py")
+    spec = importlib.util.spec_from_file_location("_bench_base_config", config_path)
+    base = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(base)
+
+    config = types.ModuleType("config")
+    config.__dict__.update({name: value for name, value in vars(base).items() if name.isupper()})
+    config.__dict__.update(overrides)
+    sys.modules["config"] = config
+    return config
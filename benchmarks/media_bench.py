@@ -0,0 +1,222 @@
+# benchmarks/media_bench.py
+#
+# Times the ffmpeg media paths against synthetic testsrc videos and writes one
+# JSON line per run (wall time, CPU time, peak RSS), so strategies can be
+# compared and regressions caught by diffing two result files.
+#
+#   python benchmarks/media_bench.py --durations 60 600 --resolutions 1280x720 1920x1080 --codecs libx264 --repeat 3 --output bench.jsonl
+#
+# Every run happens in a fresh Python process, so CPU time and peak RSS
+# (of Python itself and of the ffmpeg/vcsi children) belong to that run only.
+# CPU and RSS figures need the Unix resource module; elsewhere only wall time
+# and Python's own CPU time are reported.
+
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CASES = (
+    "contact_sheet_vcsi",
+    "contact_sheet_seek",
+    "contact_sheet_fps",
+    "screens_sequential",
+    "screens_pool",
+    "screens_single",
+    "thumbnail",
+)
+SOURCES = ("testsrc", "testsrc2")
+
+
+class SkipCase(Exception):
+    """The case can't run on this machine (e.g. vcsi isn't installed)"""
+
+
+# --------------------
+# Synthetic videos
+# --------------------
+def make_test_video(video_dir, duration, resolution, codec, source="testsrc2", rate=30):
+    """Render a synthetic video with ffmpeg's lavfi source (reused if it already exists)"""
+    name = f"{source}_{resolution}_{int(duration)}s_{codec}.mkv"
+    path = os.path.join(video_dir, name)
+    if os.path.exists(path):
+        return path
+
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi",
+        "-i", f"{source}=size={resolution}:rate={rate}:duration={duration}",
+        "-c:v", codec,
+        "-pix_fmt", "yuv420p",
+        # The .part suffix hides the container from ffmpeg's guess
+        "-f", "matroska",
+        path + ".part"
+    ]
+    print(f"[bench] Rendering {name}...", file=sys.stderr)
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    os.replace(path + ".part", path)
+    return path
+
+
+# --------------------
+# Single run (child process)
+# --------------------
+def run_case(case, video_path, duration, dimensions):
+    """Run one case in this process; returns the number of outputs produced"""
+    import utils.ffmpeg_utils as ffmpeg_utils
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        sheet_path = os.path.join(output_dir, "contactsheet.jpg")
+        if case == "contact_sheet_vcsi":
+            # Without vcsi generate_contact_sheet falls back to the seek method,
+            # which would then be reported under the vcsi label
+            if not shutil.which("vcsi"):
+                raise SkipCase("vcsi not installed")
+            ffmpeg_utils.CONTACT_SHEET_ENGINE = "vcsi"
+            return int(bool(ffmpeg_utils.generate_contact_sheet(video_path, sheet_path, "bench", duration, dimensions)))
+        if case == "contact_sheet_seek":
+            return int(bool(ffmpeg_utils.generate_contact_sheet_ffmpeg_seek(video_path, sheet_path, "bench", duration, dimensions)))
+        if case == "contact_sheet_fps":
+            return int(bool(ffmpeg_utils.generate_contact_sheet_ffmpeg_fast(video_path, sheet_path, "bench", duration, dimensions)))
+        if case.startswith("screens_"):
+            mode = case.split("_", 1)[1]
+            return len(ffmpeg_utils.generate_individual_screens(video_path, output_dir, duration, mode=mode))
+        if case == "thumbnail":
+            thumb_path = ffmpeg_utils.generate_video_thumbnail(video_path, time_sec=min(30, duration / 2))
+            if thumb_path and os.path.exists(thumb_path):
+                os.remove(thumb_path)
+                return 1
+            return 0
+        raise ValueError(f"Unknown case: {case}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def _worker(args):
+    """Entry point of the per-run child process: run the case, print one JSON result"""
+    # The child's own chatter goes to stderr so stdout carries only the result
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    error = None
+    try:
+        outputs = run_case(args.case, args.video, args.duration, args.dimensions)
+    except SkipCase as e:
+        real_stdout.write(json.dumps({"ok": False, "skipped": str(e)}) + "\n")
+        return
+    except Exception as e:
+        outputs, error = 0, str(e)
+    result = {
+        "wall_s": round(time.perf_counter() - start, 4),
+        "outputs": outputs,
+        "ok": error is None and outputs > 0,
+        "error": error,
+    }
+
+    if resource:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        # ru_maxrss is KB on Linux and bytes on macOS
+        rss_unit = 1 if sys.platform == "darwin" else 1024
+        result.update({
+            "cpu_user_s": round(own.ru_utime + children.ru_utime, 4),
+            "cpu_sys_s": round(own.ru_stime + children.ru_stime, 4),
+            "peak_rss_bytes": own.ru_maxrss * rss_unit,
+            "peak_child_rss_bytes": children.ru_maxrss * rss_unit,
+        })
+    else:
+        result["cpu_python_s"] = round(time.process_time() - start_cpu, 4)
+
+    real_stdout.write(json.dumps(result) + "\n")
+
+
+# --------------------
+# Benchmark driver
+# --------------------
+def benchmark(video_path, video_info, cases=CASES, repeat=1):
+    """Run every case `repeat` times, each in its own process; yields result dicts"""
+    dimensions = video_info["resolution"]
+    for case in cases:
+        for run in range(repeat):
+            cmd = [
+                sys.executable, os.path.abspath(__file__), "--worker",
+                "--case", case,
+                "--video", video_path,
+                "--duration", str(video_info["duration"]),
+                "--dimensions", dimensions,
+            ]
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            try:
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                result = {"ok": False, "error": f"worker exited with {proc.returncode}"}
+            yield {"case": case, "run": run, "video": video_info, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ffmpeg media paths on synthetic videos")
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600], help="Video durations in seconds")
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080", "3840x2160"])
+    parser.add_argument("--codecs", nargs="+", default=["libx264", "libx265"])
+    parser.add_argument("--source", choices=SOURCES, default="testsrc2")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--video-dir", help="Keep the rendered test videos here (default: a temp dir, removed afterwards)")
+    parser.add_argument("--output", help="Append JSON lines here instead of printing them")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--video", help=argparse.SUPPRESS)
+    parser.add_argument("--duration", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--dimensions", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args)
+        return
+
+    video_dir = args.video_dir or tempfile.mkdtemp(prefix="stashsync-bench-")
+    os.makedirs(video_dir, exist_ok=True)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for duration in args.durations:
+            for resolution in args.resolutions:
+                for codec in args.codecs:
+                    try:
+                        video_path = make_test_video(video_dir, duration, resolution, codec, args.source)
+                    except subprocess.CalledProcessError as e:
+                        print(f"[bench] Can't render {resolution} {codec}: {e.stderr.strip()}", file=sys.stderr)
+                        continue
+                    video_info = {"source": args.source, "duration": duration, "resolution": resolution, "codec": codec}
+                    for result in benchmark(video_path, video_info, args.cases, args.repeat):
+                        out.write(json.dumps(result) + "\n")
+                        out.flush()
+                        if result.get("ok"):
+                            status = f"{result['wall_s']:7.2f}s"
+                        elif result.get("skipped"):
+                            status = f"SKIPPED ({result['skipped']})"
+                        else:
+                            status = f"FAILED {result.get('error') or ''}"
+                        print(f"[bench] {resolution} {codec} {duration:g}s {result['case']:<20} {status}", file=sys.stderr)
+    finally:
+        if args.output:
+            out.close()
+        if not args.video_dir:
+            shutil.rmtree(video_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
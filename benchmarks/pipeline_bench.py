@@ -0,0 +1,192 @@
+# benchmarks/pipeline_bench.py
+#
+# End-to-end load test of the scene workflow against local stub Stash and
+# HamsterImg servers (benchmarks/stub_servers.py): lookup -> image downloads
+# -> generate + upload for N scenes at a given concurrency. Reports per-stage
+# latency percentiles and throughput as JSON. Needs only ffmpeg, Pillow and
+# requests (plus ffprobe with --video, to read its duration), so it runs on a
+# plain Linux CI box (no config.py required).
+#
+#   python benchmarks/pipeline_bench.py --scenes 20 --concurrency 4 --upload-latency-ms 150 --upload-kbps 4096 --upload-error-rate 0.05
+
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _bench_config import install_config
+
+STAGES = ("lookup", "images", "generate_upload", "total")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(timings):
+    """{stage: [seconds]} -> {stage: {count, p50, p90, p95, p99, max, mean}}"""
+    summary = {}
+    for stage, values in timings.items():
+        if not values:
+            continue
+        summary[stage] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 4),
+            **{f"p{pct}": round(percentile(values, pct), 4) for pct in (50, 90, 95, 99)},
+            "max": round(max(values), 4),
+        }
+    return summary
+
+
+def run_pipeline(stash, hamster, scene_ids, concurrency, generate=True):
+    """
+    Drive the same steps as the GUI's lookup and generate_and_upload (their
+    headless cores) for every scene; returns ({stage: [seconds]}, failures).
+    """
+    from config import HAMSTER_API_KEY
+    from utils.stash_session import create_stash_session
+    from utils.scene_utils import fetch_scene, download_scene_images
+    from utils.upload_utils import process_scene_media
+
+    session = create_stash_session()
+    timings = {stage: [] for stage in STAGES}
+    failures = []
+    lock = threading.Lock()
+
+    def one_scene(scene_id):
+        stage_times = {}
+        started = time.perf_counter()
+        try:
+            t = time.perf_counter()
+            scene = fetch_scene(session, scene_id, graphql_url=stash.graphql_url, use_cache=False)
+            stage_times["lookup"] = time.perf_counter() - t
+            scene["scene_id"] = str(scene_id)
+
+            t = time.perf_counter()
+            studio_image_data, performer_images_data = download_scene_images(scene, session)
+            stage_times["images"] = time.perf_counter() - t
+
+            if generate:
+                t = time.perf_counter()
+                lines = process_scene_media(
+                    scene, studio_image_data, performer_images_data, scene["title"],
+                    HAMSTER_API_KEY, hamster.upload_url, session, stash.url
+                )
+                stage_times["generate_upload"] = time.perf_counter() - t
+                if not lines:
+                    raise RuntimeError("nothing was uploaded")
+            stage_times["total"] = time.perf_counter() - started
+        except Exception as e:
+            with lock:
+                failures.append({"scene_id": scene_id, "error": str(e)})
+            return
+        with lock:
+            for stage, elapsed in stage_times.items():
+                timings[stage].append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(one_scene, scene_ids))
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against local stub servers")
+    parser.add_argument("--scenes", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--video", help="Video file to serve for every scene (default: render a synthetic one)")
+    parser.add_argument("--video-duration", type=float, default=120)
+    parser.add_argument("--video-resolution", default="1920x1080")
+    parser.add_argument("--performers", type=int, default=3)
+    parser.add_argument("--stash-latency-ms", type=float, default=0)
+    parser.add_argument("--upload-latency-ms", type=float, default=0)
+    parser.add_argument("--upload-kbps", type=float, default=0, help="Simulated upload bandwidth per request (0 = unlimited)")
+    parser.add_argument("--upload-error-rate", type=float, default=0.0, help="Fraction of uploads answered with 503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--lookup-only", action="store_true", help="Skip generate + upload")
+    parser.add_argument("--remote", action="store_true", help="Extract frames over the stub's /scene/{id}/stream endpoint")
+    parser.add_argument("--output", help="Append the JSON summary to this file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="stashsync-pipeline-")
+    # Fresh caches per run, and no upload ledger or frame cache short-circuiting the work
+    install_config(
+        HAMSTER_API_KEY="bench",
+        STASH_API_KEY="",
+        SCENE_CACHE_PATH="",
+        IMAGE_CACHE_DIR=os.path.join(work_dir, "image_cache"),
+        UPLOAD_LEDGER_PATH=None,
+        FRAME_CACHE_DIR=None,
+        PREFETCH_DEPTH=0,
+        REMOTE_EXTRACTION="always" if args.remote else "off",
+    )
+    from stub_servers import StubStash, StubHamster
+    from media_bench import make_test_video
+    from screens_modes import probe_duration
+
+    stash = hamster = None
+    try:
+        width, height = (int(x) for x in args.video_resolution.split("x"))
+        if args.video:
+            video_path = os.path.abspath(args.video)
+            duration = probe_duration(video_path)
+        else:
+            video_path = make_test_video(work_dir, args.video_duration, args.video_resolution, "libx264")
+            duration = args.video_duration
+
+        stash = StubStash(video_path, duration, width, height, performers=args.performers, latency_ms=args.stash_latency_ms)
+        hamster = StubHamster(args.upload_latency_ms, args.upload_kbps, args.upload_error_rate, seed=args.seed)
+
+        scene_ids = list(range(1, args.scenes + 1))
+        started = time.perf_counter()
+        timings, failures = run_pipeline(stash, hamster, scene_ids, args.concurrency, generate=not args.lookup_only)
+        elapsed = time.perf_counter() - started
+        from utils.metrics import stage_stats
+
+        result = {
+            "scenes": args.scenes,
+            "concurrency": args.concurrency,
+            "video": {"path": video_path, "duration": duration, "resolution": args.video_resolution},
+            "stash_latency_ms": args.stash_latency_ms,
+            "upload": {"latency_ms": args.upload_latency_ms, "kbps": args.upload_kbps, "error_rate": args.upload_error_rate},
+            "wall_s": round(elapsed, 3),
+            "throughput_scenes_per_s": round((args.scenes - len(failures)) / elapsed, 4) if elapsed else None,
+            "stages": summarize(timings),
+            "spans": {
+                stage: {"count": stats["count"], "sum_s": round(stats["sum"], 4), "errors": stats["errors"]}
+                for stage, stats in stage_stats().items()
+            },
+            "remote": args.remote,
+            "stream_bytes": stash.stream_bytes,
+            "stash_requests": stash.requests,
+            "hamster_uploads": hamster.uploads,
+            "hamster_upload_bytes": hamster.upload_bytes,
+            "hamster_errors": hamster.errors,
+            "failures": failures,
+        }
+        print(json.dumps(result, indent=2))
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+        sys.exit(1 if failures else 0)
+    finally:
+        if stash:
+            stash.close()
+        if hamster:
+            hamster.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
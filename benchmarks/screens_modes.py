@@ -0,0 +1,79 @@
+# benchmarks/screens_modes.py
+#
+# Times every generate_individual_screens mode against one video file.
+#
+#   python benchmarks/screens_modes.py "X:\\Scenes\\some_scene.mp4" --repeat 3
+
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ffmpeg_utils import generate_individual_screens
+
+MODES = ("sequential", "pool", "single")
+
+
+def probe_duration(video_path):
+    """Return the video duration in seconds using ffprobe"""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        video_path
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return float(result.stdout.strip())
+
+
+def benchmark_screen_modes(video_path, duration, count=12, repeat=1, modes=MODES):
+    """Run each mode `repeat` times; returns {mode: best wall time in seconds}"""
+    timings = {}
+    for mode in modes:
+        best = None
+        for _ in range(repeat):
+            output_dir = tempfile.mkdtemp()
+            try:
+                start = time.perf_counter()
+                screens = generate_individual_screens(video_path, output_dir, duration, count=count, mode=mode)
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+            if len(screens) != count:
+                print(f"[bench] {mode}: only {len(screens)}/{count} screens generated")
+            best = elapsed if best is None else min(best, elapsed)
+        timings[mode] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare screen extraction modes for a video file")
+    parser.add_argument("video_path")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--duration", type=float, help="Skip ffprobe and use this duration")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    duration = args.duration or probe_duration(args.video_path)
+    timings = benchmark_screen_modes(args.video_path, duration, count=args.count, repeat=args.repeat)
+    winner = min(timings, key=timings.get)
+
+    if args.json:
+        print(json.dumps({"video": args.video_path, "duration": duration, "timings": timings, "winner": winner}))
+        return
+
+    print(f"\n{args.video_path} ({duration:.1f}s, {args.count} screens)")
+    for mode, elapsed in sorted(timings.items(), key=lambda x: x[1]):
+        print(f"  {mode:<10} {elapsed:7.2f}s")
+    print(f"Fastest: {winner} -> set SCREENS_MODE = \"{winner}\" in config.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/startup_bench.py
+#
+# Measures cold import time of the entry points and core modules, each in a
+# fresh interpreter, and checks them against a startup budget: a time limit,
+# plus heavy modules that must not be loaded at import time (the core must
+# never pull in tkinter; the CLI entry point not even requests or Pillow).
+# Exits non-zero when a budget is exceeded, so it can guard CI.
+#
+#   python benchmarks/startup_bench.py --repeat 5
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# module -> (budget in ms, modules that must not be imported along with it)
+TARGETS = {
+    "stashsync": (40, ("tkinter", "requests", "PIL", "numpy")),
+    "utils.scene_utils": (400, ("tkinter", "PIL", "numpy")),
+    "utils.ffmpeg_utils": (400, ("tkinter", "PIL", "numpy")),
+    "utils.upload_utils": (500, ("tkinter", "PIL", "numpy")),
+    "utils.batch_utils": (500, ("tkinter", "PIL", "numpy")),
+}
+WATCHED = ("tkinter", "requests", "PIL", "numpy", "urllib3")
+
+_CHILD = """
+import sys, time, json, importlib
+sys.path.insert(0, {bench_dir!r})
+from _bench_config import install_config
+install_config()
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {watched!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module):
+    """Import module in a fresh interpreter; returns {"ms", "loaded"}"""
+    code = _CHILD.format(bench_dir=BENCH_DIR, module=module, watched=WATCHED)
+    result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else f"exit {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_budget(module, repeat=3, budget_ms=None):
+    """Best-of-repeat import time for one target and whether it fits the budget"""
+    default_budget, forbidden = TARGETS.get(module, (None, ("tkinter",)))
+    budget_ms = budget_ms or default_budget
+    runs = [measure_import(module) for _ in range(repeat)]
+    best = min(run["ms"] for run in runs)
+    loaded = runs[0]["loaded"]
+    violations = [f"imports {name}" for name in forbidden if name in loaded]
+    if budget_ms and best > budget_ms:
+        violations.append(f"{best:.0f} ms > {budget_ms} ms budget")
+    return {
+        "module": module,
+        "best_ms": round(best, 2),
+        "budget_ms": budget_ms,
+        "loaded": loaded,
+        "ok": not violations,
+        "violations": violations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time and import hygiene of the startup path")
+    parser.add_argument("modules", nargs="*", default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, help="Override the per-module time budget")
+    parser.add_argument("--json", action="store_true", help="Print one JSON line per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            result = check_budget(module, args.repeat, args.budget_ms)
+        except RuntimeError as e:
+            result = {"module": module, "ok": False, "violations": [f"import failed: {e}"]}
+        failed |= not result["ok"]
+
+        if args.json:
+            print(json.dumps(result))
+        elif "best_ms" in result:
+            status = "ok" if result["ok"] else "OVER BUDGET: " + ", ".join(result["violations"])
+            print(f"  {module:<22} {result['best_ms']:8.1f} ms  (budget {result['budget_ms']} ms)  loads {result['loaded'] or '-'}  {status}")
+        else:
+            print(f"  {module:<22} {result['violations'][0]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
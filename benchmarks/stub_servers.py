@@ -0,0 +1,249 @@
+# benchmarks/stub_servers.py
+#
+# Local stand-ins for Stash and HamsterImg, for load-testing the scene
+# workflow without touching production servers. Both listen on 127.0.0.1 on
+# a free port and run in a daemon thread.
+
+import io
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from PIL import Image
+
+
+def make_test_image(width, height):
+    """A JPEG with some noise in it, so it doesn't compress to nothing"""
+    image = Image.effect_noise((width, height), 40).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class _StubServer:
+    """Runs a handler class on a free local port until close()"""
+
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients hang up mid-response (ffmpeg drops a stream once it has its frame)
+            pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+# --------------------
+# Stash
+# --------------------
+class _StashHandler(_QuietHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        stub.count_request()
+        payload = json.loads(self.read_body() or b"{}")
+        stub.delay()
+
+        variables = payload.get("variables") or {}
+        query = payload.get("query") or ""
+        if "findScenes(" in query:
+            data = {"findScenes": {"count": 0, "scenes": []}}
+        elif "id" in variables:
+            data = {"findScene": stub.scene(variables["id"])}
+        else:
+            # Aliased multi-scene query: id0..idN -> s0..sN
+            data = {f"s{name[2:]}": stub.scene(value) for name, value in variables.items() if name.startswith("id")}
+        self.send_body(200, json.dumps({"data": data}).encode(), "application/json")
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count_request()
+        stub.delay()
+        if self.path.split("?")[0].endswith("/stream"):
+            self.send_stream(stub)
+            return
+        etag = f'"{hashlib.md5(self.path.encode()).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(200, stub.image, "image/jpeg", {"ETag": etag})
+
+    def send_stream(self, stub):
+        """Serve the video for /scene/{id}/stream, honouring single Range requests"""
+        size = os.path.getsize(stub.video_path)
+        start, end = 0, size - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else end
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        remaining = end - start + 1
+        with open(stub.video_path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(remaining, 256 * 1024))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+                stub.count_stream(len(chunk))
+
+
+class StubStash(_StubServer):
+    """
+    Answers findScene (plain and aliased) for any ID with a scene pointing at
+    video_path, and serves a JPEG for every studio/performer/screenshot URL.
+    Image URLs are unique per scene, so each scene exercises a download.
+    /scene/{id}/stream serves video_path with range support, counting the
+    bytes actually sent.
+    """
+
+    def __init__(self, video_path, duration, width, height, performers=3, latency_ms=0, image_size=(400, 600)):
+        self.video_path = video_path
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.performers = performers
+        self.latency_ms = latency_ms
+        self.image = make_test_image(*image_size)
+        self.stream_bytes = 0
+        super().__init__(_StashHandler)
+        self.graphql_url = f"{self.url}/graphql"
+
+    def delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def count_stream(self, size):
+        with self.lock:
+            self.stream_bytes += size
+
+    def scene(self, scene_id):
+        return {
+            "id": str(scene_id),
+            "title": f"Benchmark scene {scene_id}",
+            "details": "Synthetic scene served by the benchmark stub.",
+            "updated_at": "2024-01-01T00:00:00Z",
+            "studio": {"name": "Bench Studio", "image_path": f"{self.url}/studio/{scene_id}/image"},
+            "performers": [
+                {"name": f"Performer {n}", "image_path": f"{self.url}/performer/{scene_id}-{n}/image"}
+                for n in range(self.performers)
+            ],
+            "tags": [{"name": "benchmark"}],
+            "files": [{
+                "path": self.video_path,
+                "size": os.path.getsize(self.video_path),
+                "duration": self.duration,
+                "width": self.width,
+                "height": self.height,
+                "fingerprints": [{"type": "oshash", "value": f"bench{scene_id}"}],
+            }],
+        }
+
+
+# --------------------
+# HamsterImg
+# --------------------
+class _HamsterHandler(_QuietHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        number = stub.count_request()
+        started = time.monotonic()
+        body = self.read_body()
+
+        # Latency plus transfer time at the configured bandwidth
+        delay = stub.latency_ms / 1000
+        if stub.bandwidth_kbps:
+            delay += len(body) / (stub.bandwidth_kbps * 1024)
+        delay -= time.monotonic() - started
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < stub.error_rate:
+            stub.count_error()
+            self.send_body(503, b'{"status_code": 503, "status_txt": "Stub error"}', "application/json")
+            return
+        stub.count_upload(len(body))
+        result = {"status_code": 200, "image": {"url": f"{stub.url}/images/{number}.jpg"}}
+        self.send_body(200, json.dumps(result).encode(), "application/json")
+
+
+class StubHamster(_StubServer):
+    """Accepts uploads with configurable latency, bandwidth and (503) error rate"""
+
+    def __init__(self, latency_ms=0, bandwidth_kbps=0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.error_rate = error_rate
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.errors = 0
+        if seed is not None:
+            random.seed(seed)
+        super().__init__(_HamsterHandler)
+        self.upload_url = f"{self.url}/api/1/upload"
+
+    def count_upload(self, size):
+        with self.lock:
+            self.uploads += 1
+            self.upload_bytes += size
+
+    def count_error(self):
+        with self.lock:
+            self.errors += 1
@@ -7,6 +7,18 @@ STASH_API_KEY = "YOUR_STASH_API_KEY_HERE"
 HAMSTER_UPLOAD_URL = "https://hamsterimg.net/api/1/upload"
 HAMSTER_API_KEY = "YOUR_HAMSTER_API_KEY_HERE"
 
+# ---- Stash Image Cache ----
+# Studio/performer images: in-memory LRU in front of an on-disk store.
+# Set IMAGE_CACHE_DIR = None to keep the cache in memory only.
+IMAGE_CACHE_DIR = "image_cache"
+IMAGE_CACHE_MEMORY_MB = 64
+# Least recently used images are deleted from IMAGE_CACHE_DIR above this size
+IMAGE_CACHE_MAX_MB = 256
+# Serve cached images without asking Stash for this long, then revalidate (ETag / If-Modified-Since)
+IMAGE_CACHE_FRESH_SECONDS = 300
+# Studio/performer images downloaded in parallel per scene
+IMAGE_DOWNLOAD_WORKERS = 6
+
 # ---- Files / Config ----
 CONFIG_FILE = "path_mappings.json"
 
@@ -16,3 +28,100 @@ CONTACT_COLS = 3
 THUMB_WIDTH = 267
 THUMB_HEIGHT = 150
 CONTACT_HEADER_HEIGHT = 80
+# "vcsi" (falls back to "seek"), "seek" (seek to each tile) or "fps" (decode the whole video)
+CONTACT_SHEET_ENGINE = "vcsi"
+
+# ---- GUI ----
+# Wait this long after the last keystroke in the Stash ID field before looking it up
+LOOKUP_DEBOUNCE_MS = 400
+
+# Looked-up scenes are kept in SCENE_CACHE_PATH ("" keeps them in memory only). Within
+# SCENE_CACHE_TTL_SECONDS they are used as-is; after that Stash is asked only for the scene's
+# updated_at and the full scene is fetched again if it changed. If Stash does not answer within
+# SCENE_REVALIDATE_TIMEOUT seconds the cached scene is used anyway.
+SCENE_CACHE_PATH = "scene_cache.sqlite3"
+SCENE_CACHE_TTL_SECONDS = 300
+SCENE_REVALIDATE_TIMEOUT = 3
+# Most recently used scenes kept in memory in front of SCENE_CACHE_PATH
+SCENE_CACHE_MEMORY_ENTRIES = 1000
+# After a lookup, prefetch the next PREFETCH_DEPTH scene IDs (and the previous ones with
+# PREFETCH_BACKWARD) in the background. 0 disables. PREFETCH_MAX_KBPS = 0 means no limit.
+PREFETCH_DEPTH = 1
+PREFETCH_BACKWARD = False
+PREFETCH_MAX_KBPS = 2048
+
+# ---- Batch Mode ----
+BATCH_WORKERS = 4
+BATCH_OUTPUT_DIR = "bbcode_output"
+# Scenes per aliased findScene request / findScenes page
+GRAPHQL_BATCH_SIZE = 50
+GRAPHQL_PAGE_SIZE = 100
+
+# ---- Uploads ----
+# Parallel HamsterImg uploads over one keep-alive connection pool
+UPLOAD_WORKERS = 4
+# Retries for timeouts, connection errors, 429 and 5xx, with exponential backoff
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF_SECONDS = 1.0
+# Content hash -> Hamster URL ledger, so identical images are uploaded once.
+# Set UPLOAD_LEDGER_PATH = None to disable.
+UPLOAD_LEDGER_PATH = "upload_ledger.sqlite3"
+# HEAD-check a stored URL before reusing it
+UPLOAD_LEDGER_VERIFY = False
+
+# ---- Frame Extraction ----
+# "shared": one decode per timestamp feeds both the contact sheet tiles and the screens
+# "separate": contact sheet (CONTACT_SHEET_ENGINE) and screens are generated independently
+FRAME_PLAN = "shared"
+# With the shared plan, stream frames from ffmpeg into memory and upload the
+# encoded bytes directly instead of going through temporary JPEG files
+IN_MEMORY_FRAMES = True
+# When the mapped file isn't reachable (no mapping, share not mounted), read the scene
+# over HTTP from Stash's /scene/{id}/stream endpoint instead. ffmpeg seeks with range
+# requests and extracts every frame in one process, but each range is open-ended, so
+# it transfers more than the frames themselves (how much depends on the container
+# and the connection). Check benchmarks/pipeline_bench.py --remote (stream_bytes).
+#   "fallback": only when the local file is missing   "always": never read local files
+#   "off": give up with "Video file not found"
+REMOTE_EXTRACTION = "fallback"
+
+# ---- Output Encoding ----
+# Contact sheet and screens are encoded as "jpeg" (progressive, optimized) or "webp"
+IMAGE_FORMAT = "jpeg"
+IMAGE_QUALITY = 95
+# Optional per-image size budgets in KB (0 = no limit). The highest quality down to
+# IMAGE_MIN_QUALITY that fits the budget is used, trading upload time against detail.
+SCREEN_MAX_KB = 0
+CONTACT_SHEET_MAX_KB = 0
+IMAGE_MIN_QUALITY = 40
+# Studio logos and performer portraits are shrunk to this width before upload
+# (the BBCode shows them at 100/123px; 2x leaves room for HiDPI). 0 uploads them as-is.
+STUDIO_IMAGE_MAX_WIDTH = 200
+PERFORMER_IMAGE_MAX_WIDTH = 246
+
+# ---- Frame Cache ----
+# Decoded frames from the in-memory pipeline, keyed by the file's Stash fingerprint.
+# Set FRAME_CACHE_DIR = None to disable.
+FRAME_CACHE_DIR = "frame_cache"
+FRAME_CACHE_MAX_MB = 2048
+# Contact sheet tiles reuse the nearest cached frame within this fraction of the tile
+# interval, so a layout change recomposes from cached frames (0.5 = nearest for any slot)
+FRAME_CACHE_SNAP = 0.5
+
+# ---- Screens ----
+# "sequential", "pool" (SCREENS_WORKERS ffmpeg processes at once) or "single" (one ffmpeg process)
+# Also used for the contact sheet tiles of the "seek" engine
+SCREENS_MODE = "pool"
+SCREENS_WORKERS = 4
+
+# ---- Metrics ----
+# Timed spans for every stage (GraphQL, image downloads, ffmpeg runs, compositing, uploads)
+# are appended to METRICS_JSONL_PATH as JSON lines, e.g. "metrics.jsonl" (None disables).
+METRICS_JSONL_PATH = None
+# Serve per-stage latency histograms at http://127.0.0.1:<port>/metrics (Prometheus format). 0 disables.
+METRICS_PORT = 0
+
+# ---- Profiling ----
+# Where `python stashsync.py --profile` saves the GUI's CPU/memory reports
+# (batch runs save them in <output-dir>/profiles)
+PROFILE_DIR = "profiles"
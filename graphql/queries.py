@@ -1,23 +1,62 @@
+SCENE_FIELDS_FRAGMENT = """
+fragment SceneFields on Scene {
+  id
+  title
+  details
+  updated_at
+  studio {
+    name
+    image_path
+  }
+  performers {
+    name
+    image_path
+  }
+  tags { name }
+  files {
+    path
+    size
+    duration
+    width
+    height
+    fingerprints { type value }
+  }
+}
+"""
+
 FIND_SCENE_QUERY = """
 query FindScene($id: ID!) {
-  findScene(id: ID!) {
-    title
-    details
-    studio {
-      name
-      image_path
-    }
-    performers {
-      name
-      image_path
-    }
-    tags { name }
-    files {
-      path
-      duration
-      width
-      height
-    }
+  findScene(id: $id) {
+    ...SceneFields
+  }
+}
+""" + SCENE_FIELDS_FRAGMENT
+
+SCENE_UPDATED_AT_QUERY = """
+query FindSceneUpdatedAt($id: ID!) {
+  findScene(id: $id) {
+    updated_at
   }
 }
 """
+
+FIND_SCENES_QUERY = """
+query FindScenes($filter: FindFilterType, $scene_filter: SceneFilterType) {
+  findScenes(filter: $filter, scene_filter: $scene_filter) {
+    count
+    scenes {
+      ...SceneFields
+    }
+  }
+}
+""" + SCENE_FIELDS_FRAGMENT
+
+
+def build_find_scenes_by_id_query(count):
+    """
+    Query fetching `count` scenes in one request with aliased findScene
+    fields: s0 .. s{count-1}, taking variables id0 .. id{count-1}.
+    """
+    variables = ", ".join(f"$id{i}: ID!" for i in range(count))
+    fields = "\n".join(f"  s{i}: findScene(id: $id{i}) {{ ...SceneFields }}" for i in range(count))
+    return f"query FindScenesById({variables}) {{\n{fields}\n}}\n" + SCENE_FIELDS_FRAGMENT
@@ -0,0 +1,314 @@
+# gui/lookup.py
+
+import io
+import re
+import tkinter as tk
+from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+from utils.scene_utils import fetch_scene, download_scene_images
+from utils.metrics import span
+from utils.profiling import profiled
+from config import LOOKUP_DEBOUNCE_MS
+import requests
+
+
+# --------------------
+# Background lookup state
+# --------------------
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lookup")
+_lookup_state = {"generation": 0, "after_id": None, "future": None, "last_id": None}
+
+
+def lookup(
+    stash_id_entry,
+    studio_var,
+    title_var,
+    desc_text,
+    tags_text,
+    generate_btn,
+    studio_image_label,
+    performer_scrollable,
+    studio_image_data,
+    performer_images_data,
+    current_scene_data,
+    stash_session,
+    QUERY,
+    STASH_GRAPHQL_URL,
+    prefetcher=None
+):
+    """
+    Lookup scene by Stash ID and populate GUI.
+    The GraphQL request and image downloads run on a background executor;
+    widget updates are handed back to the Tk main loop with after(). Text
+    fields and performer cards appear as soon as the scene metadata arrives,
+    and each image is filled in as its download finishes. Generate is only
+    enabled once every image download has finished, so it never uploads a
+    partial set. Results for an ID that has changed in the meantime are
+    dropped. Once the scene is found, the optional prefetcher warms the
+    caches for its neighbours.
+    """
+    stash_id = stash_id_entry.get().strip()
+    if not stash_id.isdigit():
+        return
+
+    generation = _lookup_state["generation"]
+    # Shared between the main-thread callbacks below (always run in order)
+    card_labels = {}
+    performer_slots = []
+
+    def on_main_thread(func, *args):
+        """Run func on the Tk main loop, unless a newer lookup has started"""
+        def run():
+            if generation == _lookup_state["generation"] and stash_id_entry.get().strip() == stash_id:
+                func(*args)
+        stash_id_entry.after(0, run)
+
+    def work():
+        if generation != _lookup_state["generation"]:
+            return
+        try:
+            with span("lookup", scene_id=stash_id):
+                scene = fetch_scene(stash_session, stash_id, QUERY, STASH_GRAPHQL_URL)
+        except RuntimeError as e:
+            on_main_thread(messagebox.showerror, "GraphQL Error", str(e))
+            return
+        except requests.exceptions.RequestException as e:
+            on_main_thread(messagebox.showerror, "Error", f"Request failed: {str(e)}")
+            return
+        except Exception as e:
+            on_main_thread(messagebox.showerror, "Error", f"Unexpected error: {str(e)}")
+            return
+
+        if not scene:
+            on_main_thread(messagebox.showinfo, "Not found", "Scene not found")
+            return
+        if generation != _lookup_state["generation"]:
+            return
+
+        on_main_thread(
+            apply_scene,
+            scene,
+            studio_var,
+            title_var,
+            desc_text,
+            tags_text,
+            generate_btn,
+            studio_image_label,
+            performer_scrollable,
+            studio_image_data,
+            performer_images_data,
+            current_scene_data,
+            card_labels,
+            performer_slots
+        )
+
+        def on_image(kind, index, entry):
+            on_main_thread(
+                apply_image,
+                kind,
+                index,
+                entry,
+                studio_image_label,
+                studio_image_data,
+                performer_images_data,
+                card_labels,
+                performer_slots
+            )
+
+        def enable_generate():
+            generate_btn.configure(state="normal" if scene.get("files") else "disabled")
+
+        try:
+            with span("lookup_images", scene_id=stash_id):
+                download_scene_images(scene, stash_session, on_image=on_image)
+        finally:
+            # Queued behind every apply_image call, so the image data is complete by then
+            on_main_thread(enable_generate)
+
+        if prefetcher and generation == _lookup_state["generation"]:
+            prefetcher.schedule(stash_id)
+
+    def profiled_work():
+        with profiled(f"lookup-{stash_id}"):
+            work()
+
+    _lookup_state["future"] = _executor.submit(profiled_work)
+
+
+def apply_scene(
+    scene,
+    studio_var,
+    title_var,
+    desc_text,
+    tags_text,
+    generate_btn,
+    studio_image_label,
+    performer_scrollable,
+    studio_image_data,
+    performer_images_data,
+    current_scene_data,
+    card_labels,
+    performer_slots
+):
+    """
+    Populate the text fields and lay out performer cards with image
+    placeholders (Tk main thread only). Fills card_labels with
+    performer index -> image label for apply_image.
+    """
+    try:
+        # Update global storage
+        current_scene_data.clear()
+        current_scene_data.update(scene)
+
+        # GUI updates
+        studio_var.set((scene.get("studio") or {}).get("name") or "")
+        title_var.set(scene.get("title") or "")
+        desc_text.delete("1.0", tk.END)
+        desc_text.insert(tk.END, scene.get("details") or "")
+
+        # Format tags: lowercase, spaces → periods, remove special characters, separated by spaces
+        def clean_tag(tag_name):
+            # Lowercase
+            tag = tag_name.lower()
+            # Replace spaces with periods
+            tag = tag.replace(" ", ".")
+            # Remove all characters except letters, numbers, and periods
+            tag = re.sub(r"[^a-z0-9.]", "", tag)
+            # Collapse multiple periods into one
+            tag = re.sub(r"\.+", ".", tag)
+            # Strip leading/trailing periods
+            tag = tag.strip(".")
+            return tag
+
+        tags_formatted = " ".join(clean_tag(t["name"]) for t in scene.get("tags", []))
+
+        tags_text.delete("1.0", tk.END)
+        tags_text.insert(tk.END, tags_formatted)
+
+        # Enabled again once the studio and performer images are in (see lookup)
+        generate_btn.configure(state="disabled")
+
+        # Studio Image (filled in by apply_image)
+        studio_image_data.clear()
+        studio = scene.get("studio")
+        if studio and studio.get("image_path"):
+            studio_image_label.configure(image="", text="Loading...")
+        else:
+            studio_image_label.configure(image="", text="No image")
+
+        # Performer cards (images filled in by apply_image)
+        for widget in performer_scrollable.winfo_children():
+            widget.destroy()
+        performer_images_data.clear()
+        performer_slots[:] = [None] * len(scene.get("performers", []))
+
+        row, col, COLUMNS = 0, 0, 2
+        for index, performer in enumerate(scene.get("performers", [])):
+            frame = ttk.Frame(performer_scrollable, relief="solid", borderwidth=1)
+            frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+            ttk.Label(frame, text=performer.get("name", "Unknown"), font=("Arial", 10, "bold")).pack(anchor="w", padx=5, pady=5)
+
+            if performer.get("image_path"):
+                img_label = ttk.Label(frame, text="Loading...", relief="solid")
+                img_label.pack(fill="both", expand=True, padx=5, pady=5)
+                card_labels[index] = img_label
+            else:
+                ttk.Label(frame, text="No image available", relief="solid").pack(fill="both", expand=True, padx=5, pady=5)
+
+            col += 1
+            if col >= COLUMNS:
+                col = 0
+                row += 1
+
+        for c in range(COLUMNS):
+            performer_scrollable.columnconfigure(c, weight=1)
+
+    except Exception as e:
+        messagebox.showerror("Error", f"Unexpected error: {str(e)}")
+
+
+def apply_image(
+    kind,
+    index,
+    entry,
+    studio_image_label,
+    studio_image_data,
+    performer_images_data,
+    card_labels,
+    performer_slots
+):
+    """Show one downloaded studio/performer image as it arrives (Tk main thread only)"""
+    if kind == "studio":
+        if entry and display_image(entry["data"], studio_image_label):
+            studio_image_data.update(entry)
+        else:
+            studio_image_label.configure(image="", text="Download failed")
+        return
+
+    img_label = card_labels.get(index)
+    if img_label is None:
+        return
+    if entry and display_image(entry["data"], img_label, max_width=130, max_height=180):
+        performer_slots[index] = entry
+        # Keep performer images in scene order regardless of arrival order
+        performer_images_data[:] = [p for p in performer_slots if p]
+    else:
+        img_label.configure(text="Download failed")
+
+
+def on_id_changed(event, stash_id_entry, lookup_func, generate_btn=None):
+    """
+    Called on KeyRelease. Debounces typing: the lookup only runs once the ID
+    has been stable for LOOKUP_DEBOUNCE_MS, and any lookup still in flight
+    for an older ID is cancelled or has its results dropped. Generate is
+    disabled right away, since the loaded data belongs to the previous ID
+    until the new lookup finishes.
+    """
+    stash_id = stash_id_entry.get().strip()
+    if stash_id == _lookup_state["last_id"] and getattr(event, "keysym", None) != "Return":
+        return  # key release that did not change the ID (arrows, shift, ...); Enter forces a refresh
+    _lookup_state["last_id"] = stash_id
+
+    # Invalidate whatever is pending or running for the previous ID
+    _lookup_state["generation"] += 1
+    if generate_btn is not None:
+        generate_btn.configure(state="disabled")
+    if _lookup_state["after_id"]:
+        stash_id_entry.after_cancel(_lookup_state["after_id"])
+        _lookup_state["after_id"] = None
+    if _lookup_state["future"]:
+        _lookup_state["future"].cancel()
+
+    if len(stash_id) >= 4 and stash_id.isdigit():
+        def fire():
+            _lookup_state["after_id"] = None
+            lookup_func()
+        _lookup_state["after_id"] = stash_id_entry.after(LOOKUP_DEBOUNCE_MS, fire)
+
+
+# --------------------
+# Image Display
+# --------------------
+def display_image(image_data, label_widget, max_width=280, max_height=280):
+    """Display image in a Tkinter label, resizing to max dimensions"""
+    try:
+        if not image_data:
+            label_widget.configure(image="", text="No image data")
+            return False
+
+        img = Image.open(io.BytesIO(image_data))
+        img.thumbnail(
+            (max_width, max_height),
+            Image.Resampling.LANCZOS if hasattr(Image, "Resampling") else Image.ANTIALIAS
+        )
+
+        photo = ImageTk.PhotoImage(img)
+        label_widget.configure(image=photo, text="")
+        label_widget.image = photo  # Keep reference to avoid GC
+        return True
+
+    except Exception as e:
+        print(f"Image display error: {e}")
+        label_widget.configure(image="", text="Failed to display")
+        return False
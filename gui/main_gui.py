@@ -3,11 +3,49 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from paths.path_mapper import load_path_mappings
-from utils.lookup_utils import lookup, on_id_changed
-from utils.upload_utils import generate_and_upload
+from gui.lookup import lookup, on_id_changed
+from utils.upload_utils import process_scene_media
+from utils.bbcode_utils import build_bbcode
+from utils.prefetch import ScenePrefetcher
 from config import HAMSTER_API_KEY, HAMSTER_UPLOAD_URL, STASH_BASE_URL
 
 
+# --------------------
+# Generate / upload
+# --------------------
+def generate_and_upload(
+    current_scene_data,
+    studio_image_data,
+    performer_images_data,
+    title_var,
+    hamster_api_key,
+    hamster_upload_url,
+    stash_session,
+    stash_url
+):
+    """
+    GUI wrapper around process_scene_media: reports errors and success
+    through message boxes and returns a list of BBCode image links.
+    """
+    try:
+        bbcode_lines = process_scene_media(
+            current_scene_data,
+            studio_image_data,
+            performer_images_data,
+            title_var.get(),
+            hamster_api_key,
+            hamster_upload_url,
+            stash_session,
+            stash_url
+        )
+    except FileNotFoundError as e:
+        messagebox.showerror("Error", str(e))
+        return []
+
+    messagebox.showinfo("Success", "Images generated and uploaded successfully!")
+    return bbcode_lines
+
+
 # --------------------
 # Path Mapping Dialog
 # --------------------
@@ -83,9 +121,14 @@ def create_main_gui(
     HAMSTER_API_KEY,
     HAMSTER_UPLOAD_URL,
     save_path_mappings,
+    root=None,
 ):
-    """Creates the main GUI and returns widgets needed for interactions"""
-    root = tk.Tk()
+    """
+    Creates the main GUI and returns widgets needed for interactions.
+    Pass an already created (and shown) root to build the GUI into it.
+    """
+    if root is None:
+        root = tk.Tk()
     root.title("Stash Lookup")
     root.geometry("1100x750")
     root.resizable(False, False)
@@ -233,6 +276,11 @@ def create_main_gui(
     performer_images_data = []
     current_scene_data = {}
 
+    # --------------------
+    # Prefetch neighbouring scenes
+    # --------------------
+    prefetcher = ScenePrefetcher(stash_session, QUERY, STASH_GRAPHQL_URL)
+
     # --------------------
     # Bind the Stash ID Entry
     # --------------------
@@ -255,8 +303,10 @@ def create_main_gui(
                 current_scene_data,
                 stash_session,
                 QUERY,
-                STASH_GRAPHQL_URL
-            )
+                STASH_GRAPHQL_URL,
+                prefetcher=prefetcher
+            ),
+            generate_btn
         )
     )
 
@@ -265,203 +315,47 @@ def create_main_gui(
     # --------------------
     def on_generate_click():
         nonlocal current_scene_data
-        
-        # Create a session for Stash API calls
-        import requests
-        stash_session = requests.Session()
-        
-        # --- Read scene ID from entry ---
-        scene_id = stash_id_entry.get().strip()
+
+        # --- The loaded scene must be the one in the entry ---
+        scene_id = str(current_scene_data.get("id") or "")
         if not scene_id:
             messagebox.showerror("Error", "Scene ID is required for poster upload")
             return
-        current_scene_data['scene_id'] = scene_id  # <-- add scene_id here
-
-        # Now generate and upload images
-        bbcode_lines = generate_and_upload(
-            current_scene_data=current_scene_data,
-            studio_image_data=studio_image_data,
-            performer_images_data=performer_images_data,
-            title_var=title_var,
-            hamster_api_key=HAMSTER_API_KEY,
-            hamster_upload_url=HAMSTER_UPLOAD_URL,
-            stash_session=stash_session,
-            stash_url=STASH_BASE_URL
-        )
+        if stash_id_entry.get().strip() != scene_id:
+            messagebox.showerror("Error", "Scene is still loading, try again in a moment")
+            return
+        current_scene_data['scene_id'] = scene_id
+
+        # Now generate and upload images (no prefetch traffic while this runs)
+        prefetcher.pause()
+        try:
+            bbcode_lines = generate_and_upload(
+                current_scene_data=current_scene_data,
+                studio_image_data=studio_image_data,
+                performer_images_data=performer_images_data,
+                title_var=title_var,
+                hamster_api_key=HAMSTER_API_KEY,
+                hamster_upload_url=HAMSTER_UPLOAD_URL,
+                stash_session=stash_session,
+                stash_url=STASH_BASE_URL
+            )
+        finally:
+            prefetcher.resume()
         
         if not bbcode_lines:
             return
         
-        # Insert BBCode into text widget
-        bbcode_text.delete("1.0", tk.END)
-        bbcode_text.insert(tk.END, "\n".join(bbcode_lines))
+        # Build the full BBCode from the uploaded image URLs
+        bbcode_lines = build_bbcode(
+            current_scene_data,
+            studio_image_data,
+            performer_images_data,
+            title=title_var.get()
+        )
 
-        
-        # Generate the BBCode content matching the document format
-        bbcode_lines = []
-        
-        # Start with the outer table structure
-        bbcode_lines.append("[bg=#202b33][color=#F5F8FA][font=Helvetica][table=nopad,nball,vat][tr][td=#202b33][/td]")
-        bbcode_lines.append("")
-        bbcode_lines.append("[td=400px,#202b33][bg=90%][size=2]")
-        bbcode_lines.append("")
-        
-        # Studio logo (centered)
-        studio_url = studio_image_data.get('url', '') if isinstance(studio_image_data, dict) else ''
-        if studio_url:
-            bbcode_lines.append(f"[center][img=100]{studio_url}[/img][/center]")
-            bbcode_lines.append("")
-        
-        # Title and date
-        title = title_var.get() or current_scene_data.get('title', '')
-        date = current_scene_data.get('date', '')
-        bbcode_lines.append(f"[size=4][font=Arial Black]{title}[/font][/size]")
-        bbcode_lines.append(f"[imgnm]https://hamsterimg.net/images/2025/06/21/pad.png[/imgnm]{date}")
-        bbcode_lines.append("")
-        bbcode_lines.append("")
-        
-        # Details section
-        details = current_scene_data.get('details', '')
-        bbcode_lines.append("[b]Details[/b]")
-        bbcode_lines.append(f"[imgnm]https://hamsterimg.net/images/2025/06/21/pad.png[/imgnm]{details}")
-        bbcode_lines.append("")
-        bbcode_lines.append("")
-        
-        # Includes section (tags/categories)
-        tags = current_scene_data.get('tags', [])
-        if tags:
-            tag_names = [tag.get('name', '') for tag in tags if isinstance(tag, dict)]
-            if tag_names:
-                bbcode_lines.append("[b]Includes[/b]")
-                bbcode_lines.append(f"[imgnm]https://hamsterimg.net/images/2025/06/21/pad.png[/imgnm]{', '.join(tag_names)}")
-                bbcode_lines.append("")
-                bbcode_lines.append("")
-        
-        # Performers section
-        bbcode_lines.append("[b]Performers[/b][br]")
-        bbcode_lines.append("[table=nball,left][tr]")
-        bbcode_lines.append("")
-        
-        # Add performer cards
-        performers = current_scene_data.get('performers', [])
-        
-        for i, performer in enumerate(performers):
-            # Handle if performer is a string or dict
-            if isinstance(performer, dict):
-                perf_name = performer.get('name', str(performer))
-            else:
-                perf_name = str(performer)
-            
-            # Get performer image URL from performer_images_data (updated by generate_and_upload)
-            perf_img = ''
-            if isinstance(performer_images_data, list) and i < len(performer_images_data):
-                if isinstance(performer_images_data[i], dict):
-                    perf_img = performer_images_data[i].get('url', '')
-                elif isinstance(performer_images_data[i], str):
-                    perf_img = performer_images_data[i]
-            elif isinstance(performer_images_data, dict):
-                perf_img = performer_images_data.get(perf_name, {}).get('url', '') if isinstance(performer_images_data.get(perf_name), dict) else performer_images_data.get(perf_name, '')
-            
-            perf_tag = perf_name.lower().replace(' ', '.')
-            
-            bbcode_lines.append(f"[td=#30404d,124px][img=123]{perf_img}[/img][url=/torrents.php?taglist={perf_tag}][size=3][/size][color=white][bg=90%]{perf_name}")
-            bbcode_lines.append("[br][/bg][/color][/url][/td]")
-            
-            if i < len(performers) - 1:
-                bbcode_lines.append("")
-                bbcode_lines.append("[td=8px][/td]")
-            bbcode_lines.append("")
-        
-        bbcode_lines.append("[td][/td][/tr][/table]")
-        bbcode_lines.append("")
-        bbcode_lines.append("")
-        bbcode_lines.append("")
-        bbcode_lines.append("[/size][/bg][/td]")
-        bbcode_lines.append("")
-        bbcode_lines.append("")
-        
-        # Right column with video info and screens
-        bbcode_lines.append("[td=vat,800px][bg=98%]")
-        
-        # Poster image
-        poster_url = current_scene_data.get('poster_url', '')
-        if poster_url:
-            bbcode_lines.append(f"[imgnm]{poster_url}[/imgnm]")
-        
-        # Video specifications bar
-        video_file = current_scene_data.get('files', [{}])[0]
-        duration_seconds = video_file.get('duration', 0)
-        
-        # Format duration
-        hours = int(duration_seconds // 3600)
-        minutes = int((duration_seconds % 3600) // 60)
-        seconds = int(duration_seconds % 60)
-        if hours > 0:
-            duration = f"{hours}:{minutes:02d}:{seconds:02d}"
-        else:
-            duration = f"{minutes}:{seconds:02d}"
-        
-        width = video_file.get('width', 3840)
-        height = video_file.get('height', 2160)
-        resolution = f"{width}×{height}"
-        
-        # Get framerate
-        frame_rate = video_file.get('frame_rate', 29.97)
-        fps = f"{frame_rate:.2f} fps"
-        
-        # Get bitrate
-        bit_rate = video_file.get('bit_rate', 0)
-        if bit_rate > 0:
-            bitrate_mbps = bit_rate / 1_000_000
-            bitrate = f"{bitrate_mbps:.2f} Mb/s"
-        else:
-            bitrate = "18.22 Mb/s"
-        
-        codec = video_file.get('video_codec', 'h264') + "/" + video_file.get('audio_codec', 'aac')
-        
-        bbcode_lines.append("[bg=#30404d][color=#F0EEEB][size=2]")
-        bbcode_lines.append("[table=100%,nball,vam][tr]")
-        bbcode_lines.append("[td=16px][/td]")
-        bbcode_lines.append(f"[td]{duration}[/td]")
-        bbcode_lines.append(f"[td][align=right]mp4   {codec}   {resolution}   {bitrate}   {fps}[/align][/td]")
-        bbcode_lines.append("[td=16px][/td]")
-        bbcode_lines.append("[/tr][/table]")
-        bbcode_lines.append("[/size][/color][/bg]")
-        bbcode_lines.append("")
-        bbcode_lines.append("[size=2]")
-        
-        # Screens section
-        bbcode_lines.append("[b]Screens[/b]")
-        bbcode_lines.append("")
-        
-        # Add screenshot thumbnails - all on one line
-        screenshot_urls = current_scene_data.get('screenshot_urls', [])
-        if screenshot_urls:
-            screen_line = ""
-            for screenshot_url in screenshot_urls:
-                screen_line += f"[img=200]{screenshot_url}[/img]"
-            bbcode_lines.append(screen_line)
-        bbcode_lines.append("")
-        
-        # Contact sheet in spoiler
-        contact_sheet_url = current_scene_data.get('contact_sheet_url', '')
-        if contact_sheet_url:
-            bbcode_lines.append("[b]Contact Sheet[/b]")
-            bbcode_lines.append("")
-            bbcode_lines.append("[spoiler=Click to view]")
-            bbcode_lines.append(f"[img]{contact_sheet_url}[/img]")
-            bbcode_lines.append("[/spoiler]")
-        bbcode_lines.append("")
-        
-        bbcode_lines.append("[/size]")
-        bbcode_lines.append("[img]https://hamsterimg.net/images/2025/09/29/space.png[/img]")
-        bbcode_lines.append("[/bg][/td][td=#202b33][/td]")
-        bbcode_lines.append("[/tr][/table][/font][/color][/bg]")
-        
         # Insert into text widget
-        if bbcode_lines:
-            bbcode_text.delete("1.0", tk.END)
-            bbcode_text.insert(tk.END, "\n".join(bbcode_lines))
+        bbcode_text.delete("1.0", tk.END)
+        bbcode_text.insert(tk.END, "\n".join(bbcode_lines))
 
     generate_btn.config(command=on_generate_click)
 
@@ -2,8 +2,12 @@
 
 import os
 import json
+import threading
 from config import CONFIG_FILE
 
+_lock = threading.Lock()
+_cached = {"key": None, "mapper": None}
+
 
 def load_path_mappings():
     """Load path mappings from config file"""
@@ -28,6 +32,8 @@ def save_path_mappings(mappings: dict) -> bool:
     try:
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump(mappings, f, indent=2)
+        with _lock:
+            _cached["key"] = None
         return True
 
     except Exception as e:
@@ -35,29 +41,84 @@ def save_path_mappings(mappings: dict) -> bool:
         return False
 
 
-def map_path(linux_path: str, mappings: dict) -> str:
+# --------------------
+# Compiled mapper
+# --------------------
+class PathMapper:
     """
-    Convert Linux path to Windows path using mappings.
-    Longest prefix wins.
+    Path mappings compiled into a character trie over the Linux prefixes.
+    Finding the longest matching prefix walks the path once, so the cost per
+    path depends on the path length, not on how many mappings there are.
     """
-    if not linux_path:
-        return linux_path
-
-    linux_path = linux_path.replace("\\", "/")
-
-    # Longest prefix first
-    for linux_prefix, windows_prefix in sorted(
-        mappings.items(),
-        key=lambda x: len(x[0]),
-        reverse=True,
-    ):
-        if linux_path.startswith(linux_prefix):
-            relative_path = linux_path[len(linux_prefix):].lstrip("/")
 
+    def __init__(self, mappings: dict):
+        self.mappings = dict(mappings)
+        self._trie = {}
+        for linux_prefix, windows_prefix in self.mappings.items():
+            node = self._trie
+            for char in linux_prefix:
+                node = node.setdefault(char, {})
             if not windows_prefix.endswith("\\"):
                 windows_prefix += "\\"
+            # None can't clash with a path character
+            node[None] = windows_prefix
+
+    def map(self, linux_path: str) -> str:
+        """Convert a Linux path to a Windows path; longest prefix wins"""
+        if not linux_path:
+            return linux_path
+
+        linux_path = linux_path.replace("\\", "/")
 
-            return windows_prefix + relative_path.replace("/", "\\")
+        node = self._trie
+        match = node.get(None)
+        match_length = 0
+        for i, char in enumerate(linux_path):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                match, match_length = node[None], i + 1
 
-    print(f"[path_mapper] Warning: No mapping found for path: {linux_path}")
-    return linux_path
+        if match is None:
+            print(f"[path_mapper] Warning: No mapping found for path: {linux_path}")
+            return linux_path
+
+        relative_path = linux_path[match_length:].lstrip("/")
+        return match + relative_path.replace("/", "\\")
+
+    def map_paths(self, linux_paths):
+        """Map many paths at once (batch runs); returns a list in the same order"""
+        return [self.map(path) for path in linux_paths]
+
+
+def get_path_mapper() -> PathMapper:
+    """
+    The compiled mapper for the mappings file, rebuilt only when the file's
+    mtime or size changes (or after save_path_mappings).
+    """
+    try:
+        stat = os.stat(CONFIG_FILE)
+        key = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = "default"
+
+    with _lock:
+        if _cached["key"] != key or _cached["mapper"] is None:
+            _cached["mapper"] = PathMapper(load_path_mappings())
+            _cached["key"] = key
+        return _cached["mapper"]
+
+
+def map_paths(linux_paths):
+    """Map many Linux paths with the current mappings file"""
+    return get_path_mapper().map_paths(linux_paths)
+
+
+def map_path(linux_path: str, mappings: dict = None) -> str:
+    """
+    Convert Linux path to Windows path using mappings (the mappings file
+    when not given). Longest prefix wins.
+    """
+    mapper = get_path_mapper() if mappings is None else PathMapper(mappings)
+    return mapper.map(linux_path)
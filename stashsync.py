@@ -1,37 +1,130 @@
 # stashsync.py
 
-import requests
-from config import STASH_GRAPHQL_URL, STASH_API_KEY, HAMSTER_API_KEY, HAMSTER_UPLOAD_URL
-from paths.path_mapper import save_path_mappings
-from gui.main_gui import create_main_gui
+import sys
+import json
+import argparse
+from config import BATCH_WORKERS, BATCH_OUTPUT_DIR
 
-# --------------------
-# Stash HTTP Session
-# --------------------
-stash_session = requests.Session()
-stash_session.headers.update({"ApiKey": STASH_API_KEY, "Content-Type": "application/json"})
 
 # --------------------
-# Launch GUI
+# Command line
 # --------------------
-root = create_main_gui(
-    stash_session=stash_session,
-    QUERY="""
-    query FindScene($id: ID!) {
-      findScene(id: $id) {
-        title
-        details
-        studio { name image_path }
-        performers { name image_path }
-        tags { name }
-        files { path duration width height }
-      }
-    }
-    """,
-    STASH_GRAPHQL_URL=STASH_GRAPHQL_URL,
-    HAMSTER_API_KEY=HAMSTER_API_KEY,
-    HAMSTER_UPLOAD_URL=HAMSTER_UPLOAD_URL,
-    save_path_mappings=save_path_mappings
-)
-
-root.mainloop()
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="stashsync", description="Stash scene lookup and HamsterImg uploader")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile lookups and generate/upload runs (cProfile + tracemalloc reports)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Process many scenes without the GUI")
+    scene_selection = batch_parser.add_mutually_exclusive_group(required=True)
+    scene_selection.add_argument("--ids", type=scene_ids_arg, help='Scene IDs, e.g. "1200-1450,1500"')
+    scene_selection.add_argument("--filter", type=scene_filter_arg,
+                                 help="Stash SceneFilterType as JSON; streams all matching scenes")
+    batch_parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Scenes processed in parallel")
+    batch_parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR, help="Directory for per-scene BBCode files")
+
+    return parser.parse_args(argv)
+
+
+def scene_ids_arg(value):
+    """argparse type for --ids: the parsed list of scene IDs"""
+    from utils.batch_utils import parse_scene_ids
+
+    try:
+        scene_ids = parse_scene_ids(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if not scene_ids:
+        raise argparse.ArgumentTypeError("no scene IDs given")
+    return scene_ids
+
+
+def scene_filter_arg(value):
+    """argparse type for --filter: the SceneFilterType as a dict"""
+    try:
+        scene_filter = json.loads(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid JSON: {e}")
+    if not isinstance(scene_filter, dict):
+        raise argparse.ArgumentTypeError("must be a JSON object")
+    return scene_filter
+
+
+def run_batch_command(args):
+    from utils.batch_utils import run_batch
+
+    if args.filter is not None:
+        _, failed = run_batch(None, args.output_dir, workers=args.workers, scene_filter=args.filter)
+    else:
+        _, failed = run_batch(args.ids, args.output_dir, workers=args.workers)
+    return 1 if failed else 0
+
+
+def start_metrics():
+    from config import METRICS_PORT
+
+    if METRICS_PORT:
+        from utils.metrics import start_metrics_server
+        start_metrics_server(METRICS_PORT)
+
+
+def start_profiling(args):
+    import os
+    from config import PROFILE_DIR
+    from utils.profiling import enable_profiling
+
+    if args.command == "batch":
+        # Keep the reports next to the BBCode they belong to
+        enable_profiling(os.path.join(args.output_dir, "profiles"))
+    else:
+        enable_profiling(PROFILE_DIR)
+
+
+def run_gui():
+    import tkinter as tk
+
+    # Put the window on screen first; requests, Pillow and the GUI modules load behind it
+    root = tk.Tk()
+    root.title("Stash Lookup")
+    root.geometry("1100x750")
+    loading = tk.Label(root, text="Loading...")
+    loading.pack(expand=True)
+    root.update()
+
+    from config import STASH_GRAPHQL_URL, HAMSTER_API_KEY, HAMSTER_UPLOAD_URL
+    from graphql.queries import FIND_SCENE_QUERY
+    from paths.path_mapper import save_path_mappings
+    from utils.stash_session import create_stash_session
+    from gui.main_gui import create_main_gui
+
+    # --------------------
+    # Stash HTTP Session
+    # --------------------
+    stash_session = create_stash_session()
+
+    # --------------------
+    # Launch GUI
+    # --------------------
+    loading.destroy()
+    root = create_main_gui(
+        stash_session=stash_session,
+        QUERY=FIND_SCENE_QUERY,
+        STASH_GRAPHQL_URL=STASH_GRAPHQL_URL,
+        HAMSTER_API_KEY=HAMSTER_API_KEY,
+        HAMSTER_UPLOAD_URL=HAMSTER_UPLOAD_URL,
+        save_path_mappings=save_path_mappings,
+        root=root
+    )
+
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    start_metrics()
+    if args.profile:
+        start_profiling(args)
+    if args.command == "batch":
+        sys.exit(run_batch_command(args))
+    sys.exit(run_gui())
@@ -0,0 +1,158 @@
+# utils/batch_utils.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from config import STASH_BASE_URL, HAMSTER_API_KEY, HAMSTER_UPLOAD_URL
+from utils.stash_session import create_stash_session
+from utils.scene_utils import fetch_scene, download_scene_images, iter_scenes_by_ids, iter_find_scenes
+from utils.upload_utils import process_scene_media
+from utils.bbcode_utils import build_bbcode
+from utils.metrics import span
+
+
+# --------------------
+# Scene ID parsing
+# --------------------
+def parse_scene_ids(spec):
+    """
+    Parse a scene ID spec such as "1200-1450,1500,1510-1512" into an
+    ordered list of unique IDs. Raises ValueError on a malformed part.
+    """
+    ids = []
+    seen = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+                if end < start:
+                    raise ValueError
+                values = range(start, end + 1)
+            else:
+                values = [int(part)]
+        except ValueError:
+            raise ValueError(f"Invalid scene ID or range: {part!r}") from None
+        for scene_id in values:
+            if scene_id not in seen:
+                seen.add(scene_id)
+                ids.append(scene_id)
+    return ids
+
+
+# --------------------
+# Single scene
+# --------------------
+def process_scene(scene_id, stash_session, output_dir, scene=None):
+    """
+    Run lookup -> generate -> upload for one scene and write its BBCode
+    to <output_dir>/<scene_id>.txt. Returns the output path.
+    The lookup is skipped when the scene metadata is passed in.
+    """
+    # Every span of the scene (lookup, image downloads, ffmpeg, uploads) carries its scene_id
+    with span("scene", scene_id=str(scene_id)):
+        return _process_scene(scene_id, stash_session, output_dir, scene)
+
+
+def _process_scene(scene_id, stash_session, output_dir, scene):
+    if scene is None:
+        scene = fetch_scene(stash_session, scene_id)
+    if not scene:
+        raise LookupError(f"Scene {scene_id} not found")
+    scene["scene_id"] = str(scene_id)
+
+    studio_image_data, performer_images_data = download_scene_images(scene, stash_session)
+
+    bbcode_lines = process_scene_media(
+        scene,
+        studio_image_data,
+        performer_images_data,
+        scene.get("title") or "",
+        HAMSTER_API_KEY,
+        HAMSTER_UPLOAD_URL,
+        stash_session,
+        STASH_BASE_URL
+    )
+    if not bbcode_lines:
+        raise RuntimeError(f"Scene {scene_id}: nothing was uploaded")
+
+    bbcode_lines = build_bbcode(scene, studio_image_data, performer_images_data, title=scene.get("title"))
+
+    output_path = os.path.join(output_dir, f"{scene_id}.txt")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(bbcode_lines))
+    return output_path
+
+
+# --------------------
+# Batch run
+# --------------------
+def run_batch(scene_ids, output_dir, workers=4, scene_filter=None):
+    """
+    Process many scenes on a bounded worker pool.
+    Scene metadata is fetched up front in batched GraphQL requests: aliased
+    findScene fields for explicit IDs, or a paginated findScenes stream when
+    scene_ids is None and a Stash scene_filter is given. Metadata is only
+    read ahead of the workers by a small margin, so memory stays bounded.
+    Returns a dict of scene_id -> output path for successes and
+    a dict of scene_id -> error message for failures (keyed "scene_filter"
+    when a filtered run breaks off before all of its scenes are known).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stash_session = create_stash_session()
+    workers = max(1, workers)
+
+    if scene_ids is None:
+        scenes = ((scene["id"], scene, None) for scene in iter_find_scenes(stash_session, scene_filter))
+        total = "?"
+    else:
+        scenes = iter_scenes_by_ids(stash_session, scene_ids)
+        total = len(scene_ids)
+
+    done, failed = {}, {}
+    print(f"[batch_utils] Processing {total} scenes with {workers} workers -> {output_dir}")
+
+    def collect(finished):
+        for future in finished:
+            scene_id = pending.pop(future)
+            try:
+                done[scene_id] = future.result()
+                print(f"[batch_utils] ({len(done) + len(failed)}/{total}) Scene {scene_id} done")
+            except Exception as e:
+                failed[scene_id] = str(e)
+                print(f"[batch_utils] ({len(done) + len(failed)}/{total}) Scene {scene_id} failed: {e}")
+
+    pending = {}
+    seen = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for scene_id, scene, error in scenes:
+                seen.add(scene_id)
+                if error:
+                    failed[scene_id] = error
+                    print(f"[batch_utils] Scene {scene_id} lookup failed: {error}")
+                    continue
+                if not scene:
+                    failed[scene_id] = f"Scene {scene_id} not found"
+                    print(f"[batch_utils] Scene {scene_id} not found")
+                    continue
+                pending[executor.submit(process_scene, scene_id, stash_session, output_dir, scene)] = scene_id
+                # Don't read metadata too far ahead of the workers
+                if len(pending) >= workers * 2:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+        except Exception as e:
+            print(f"[batch_utils] Fetching scene metadata failed: {e}")
+            if scene_ids is None:
+                # The remaining IDs of a filter are unknown; fail the run as a whole
+                failed["scene_filter"] = f"Fetching scene metadata failed: {e}"
+            else:
+                for scene_id in scene_ids:
+                    if scene_id not in seen:
+                        failed[scene_id] = f"Fetching scene metadata failed: {e}"
+        collect(list(as_completed(pending)))
+
+    print(f"[batch_utils] Finished: {len(done)} ok, {len(failed)} failed")
+    return done, failed
@@ -0,0 +1,135 @@
+# utils/contact_sheet.py
+
+import threading
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+from config import CONTACT_ROWS, CONTACT_COLS, THUMB_WIDTH, THUMB_HEIGHT, CONTACT_HEADER_HEIGHT
+from utils.image_utils import format_duration
+
+_compositors = {}
+_compositors_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """NumPy if installed, else None (imported on first use; it is slow to import)"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _load_font(size):
+    """Arial at the given size (Pillow's default font if it isn't installed), loaded once"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+# --------------------
+# Compositor
+# --------------------
+class ContactSheetCompositor:
+    """
+    Lays tiles out on a ROWS x COLS grid under a metadata header.
+    Fonts and geometry are worked out once per layout; each sheet is a single
+    preallocated canvas that tiles are pasted into centered, one tile at a
+    time, so peak memory is the canvas plus one tile however large the
+    layout or the source frames are. With NumPy installed the tiles are
+    copied in by array assignment and the canvas is converted to an image
+    once at the end.
+    """
+
+    def __init__(self, rows=CONTACT_ROWS, cols=CONTACT_COLS, thumb_width=THUMB_WIDTH, thumb_height=THUMB_HEIGHT,
+                 header_height=CONTACT_HEADER_HEIGHT, use_numpy=None):
+        self.rows = rows
+        self.cols = cols
+        self.thumb_width = thumb_width
+        self.thumb_height = thumb_height
+        self.header_height = header_height
+        self.numpy = _load_numpy() if use_numpy is not False else None
+        self.use_numpy = self.numpy is not None
+
+        self.size = (thumb_width * cols, thumb_height * rows + header_height)
+        self.cells = [
+            (col * thumb_width, header_height + row * thumb_height)
+            for row in range(rows) for col in range(cols)
+        ]
+        self.font_title = _load_font(16)
+        self.font_info = _load_font(12)
+
+    def compose(self, tiles, title, duration, dimensions, file_size_bytes):
+        """
+        Build the sheet from tiles (file paths or PIL images, in grid order;
+        extra tiles are ignored). Images passed in are closed once pasted.
+        Returns the RGB sheet image.
+        """
+        if self.use_numpy:
+            canvas = self.numpy.zeros((self.size[1], self.size[0], 3), dtype=self.numpy.uint8)
+            paste = self._paste_array
+        else:
+            canvas = Image.new("RGB", self.size, "black")
+            paste = self._paste_image
+
+        for idx, (tile, cell) in enumerate(zip(tiles, self.cells)):
+            try:
+                with self._open_tile(tile) as thumb:
+                    paste(canvas, thumb, cell)
+            except Exception as e:
+                print(f"Error pasting frame {idx}: {e}")
+
+        sheet = Image.fromarray(canvas) if self.use_numpy else canvas
+        self._draw_header(sheet, title, duration, dimensions, file_size_bytes)
+        return sheet
+
+    def _open_tile(self, tile):
+        """Open a tile no larger than one cell; JPEGs are downscaled while decoding"""
+        thumb = tile if isinstance(tile, Image.Image) else Image.open(tile)
+        if thumb.width > self.thumb_width or thumb.height > self.thumb_height:
+            if not isinstance(tile, Image.Image):
+                thumb.draft("RGB", (self.thumb_width, self.thumb_height))
+            thumb.thumbnail((self.thumb_width, self.thumb_height))
+        if thumb.mode != "RGB":
+            converted = thumb.convert("RGB")
+            thumb.close()
+            thumb = converted
+        return thumb
+
+    def _offset(self, thumb, cell):
+        """Top-left corner that centers the tile in its cell"""
+        return (
+            cell[0] + (self.thumb_width - thumb.width) // 2,
+            cell[1] + (self.thumb_height - thumb.height) // 2,
+        )
+
+    def _paste_image(self, canvas, thumb, cell):
+        canvas.paste(thumb, self._offset(thumb, cell))
+
+    def _paste_array(self, canvas, thumb, cell):
+        x, y = self._offset(thumb, cell)
+        canvas[y:y + thumb.height, x:x + thumb.width] = self.numpy.asarray(thumb)
+
+    def _draw_header(self, sheet, title, duration, dimensions, file_size_bytes):
+        draw = ImageDraw.Draw(sheet)
+        file_size_gb = file_size_bytes / (1024**3)
+        draw.rectangle((0, 0, self.size[0], self.header_height), fill="white")
+        draw.text((10, 10), title or "Untitled", fill="black", font=self.font_title)
+        draw.text((10, 35), f"Duration: {format_duration(duration)}", fill="black", font=self.font_info)
+        draw.text((10, 55), f"Dimensions: {dimensions}", fill="black", font=self.font_info)
+        draw.text((10, 75), f"Filesize: {file_size_gb:.2f}gb", fill="black", font=self.font_info)
+
+
+def get_compositor(rows=CONTACT_ROWS, cols=CONTACT_COLS, thumb_width=THUMB_WIDTH, thumb_height=THUMB_HEIGHT,
+                   header_height=CONTACT_HEADER_HEIGHT):
+    """Shared compositor per layout; compose() keeps no state between sheets, so threads can share it"""
+    key = (rows, cols, thumb_width, thumb_height, header_height)
+    with _compositors_lock:
+        compositor = _compositors.get(key)
+        if compositor is None:
+            compositor = ContactSheetCompositor(*key)
+            _compositors[key] = compositor
+        return compositor
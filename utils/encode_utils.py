@@ -0,0 +1,143 @@
+# utils/encode_utils.py
+
+import io
+import os
+
+from config import IMAGE_FORMAT, IMAGE_QUALITY, IMAGE_MIN_QUALITY
+
+# Pillow is imported where it is used, so image_extension() stays cheap to import
+EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp"}
+
+_warned_webp = False
+
+
+# --------------------
+# Output encoding
+# --------------------
+def output_format(fmt=None):
+    """The output format to use: IMAGE_FORMAT unless given, falling back to JPEG without WebP support"""
+    global _warned_webp
+    fmt = (fmt or IMAGE_FORMAT).lower()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    if fmt == "webp" and not _webp_supported():
+        if not _warned_webp:
+            print("[encode_utils] Pillow has no WebP support, encoding JPEG instead")
+            _warned_webp = True
+        return "jpeg"
+    return fmt
+
+
+def image_extension(fmt=None):
+    """File extension for the output format, e.g. '.jpg'"""
+    return EXTENSIONS[output_format(fmt)]
+
+
+def encode_image(image, max_bytes=0, fmt=None, quality=None, min_quality=None):
+    """
+    Encode a PIL image to bytes as progressive/optimized JPEG or WebP.
+    With max_bytes, the highest quality between min_quality and quality whose
+    output fits the budget is found by binary search over in-memory trial
+    encodes; if even min_quality is too big, that smallest encode is returned.
+    """
+    fmt = output_format(fmt)
+    quality = quality or IMAGE_QUALITY
+    min_quality = min(min_quality or IMAGE_MIN_QUALITY, quality)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    data = _encode(image, fmt, quality)
+    if not max_bytes or len(data) <= max_bytes:
+        return data
+
+    best = None
+    low, high = min_quality, quality - 1
+    while low <= high:
+        mid = (low + high) // 2
+        trial = _encode(image, fmt, mid)
+        if len(trial) <= max_bytes:
+            best, low = trial, mid + 1
+        else:
+            high = mid - 1
+
+    if best is None:
+        best = _encode(image, fmt, min_quality)
+        print(f"[encode_utils] {len(best) // 1024} KB at quality {min_quality} is still over the {max_bytes // 1024} KB budget")
+    return best
+
+
+def encode_file(path, max_bytes=0, fmt=None, quality=None):
+    """
+    Re-encode an image file written by ffmpeg/vcsi with the output settings.
+    The extension follows the format, so the returned path may differ from
+    the one given (the original file is removed then).
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        data = encode_image(image, max_bytes, fmt, quality)
+    output_path = os.path.splitext(path)[0] + image_extension(fmt)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    if output_path != path:
+        os.remove(path)
+    return output_path
+
+
+def normalize_upload_image(data, max_width, fmt=None):
+    """
+    Shrink a studio/performer image from Stash to at most max_width pixels
+    wide and recompress it. Images that really use transparency stay
+    transparent (PNG, or WebP when that is the output format); everything
+    else is encoded like the screens. Returns (bytes, extension); the
+    original bytes come back (extension None) when they can't be decoded or
+    are already smaller.
+    """
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        print(f"[encode_utils] Can't normalize image, uploading as-is: {e}")
+        return data, None
+
+    fmt = output_format(fmt)
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        has_alpha = image.getchannel("A").getextrema()[0] < 255
+        if not has_alpha:
+            image = image.convert("RGB")
+    else:
+        has_alpha = False
+
+    if max_width and image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.LANCZOS)
+
+    if has_alpha and fmt != "webp":
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", optimize=True)
+        normalized, extension = buffer.getvalue(), ".png"
+    elif has_alpha:
+        normalized, extension = _encode(image, fmt, IMAGE_QUALITY), EXTENSIONS[fmt]
+    else:
+        normalized, extension = encode_image(image, fmt=fmt), EXTENSIONS[fmt]
+
+    if len(normalized) >= len(data):
+        return data, None
+    return normalized, extension
+
+
+def _webp_supported():
+    from PIL import features
+    return features.check("webp")
+
+
+def _encode(image, fmt, quality):
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
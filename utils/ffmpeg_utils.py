@@ -1,25 +1,43 @@
+import io
 import os
 import tempfile
 import subprocess
-from PIL import Image, ImageDraw, ImageFont
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from config import CONTACT_ROWS, CONTACT_COLS, THUMB_WIDTH, THUMB_HEIGHT, CONTACT_HEADER_HEIGHT
-from utils.image_utils import format_duration
+from config import CONTACT_ROWS, CONTACT_COLS, THUMB_WIDTH, THUMB_HEIGHT
+from config import SCREENS_MODE, SCREENS_WORKERS, CONTACT_SHEET_ENGINE, FRAME_CACHE_SNAP
+from config import SCREEN_MAX_KB, CONTACT_SHEET_MAX_KB
+from config import STASH_API_KEY
+from utils.encode_utils import encode_image, encode_file, image_extension
+from utils.metrics import span, bind
+from utils.frame_plan import plan_scene_frames, snap_tiles_to_cached
+from utils.frame_cache import get_frame, put_frame, cached_timestamps
 
 # --------------------
 # Contact Sheet - FAST method
 # --------------------
-def generate_contact_sheet(video_path, output_path, title, duration, dimensions):
+def generate_contact_sheet(video_path, output_path, title, duration, dimensions, file_size=None):
     """
-    Generate contact sheet - tries vcsi first, then fast FFmpeg batch extraction.
+    Generate contact sheet using CONTACT_SHEET_ENGINE from config:
+      "vcsi" - try vcsi first, then fall back to the FFmpeg seek method
+      "seek" - FFmpeg seek method only (decodes only around each tile)
+      "fps"  - FFmpeg fps-filter method (decodes the whole video)
+    A stream URL (see is_remote_video) always uses the seek method: vcsi
+    can't send the ApiKey header, and the fps method would download the
+    whole file.
     """
     ROWS = CONTACT_ROWS
     COLS = CONTACT_COLS
 
-    if not os.path.exists(video_path):
+    if not video_exists(video_path):
         print(f"Video file does not exist: {video_path}")
         return False
 
+    if CONTACT_SHEET_ENGINE == "fps" and not is_remote_video(video_path):
+        return generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration, dimensions, file_size)
+    if CONTACT_SHEET_ENGINE == "seek" or is_remote_video(video_path):
+        return generate_contact_sheet_ffmpeg_seek(video_path, output_path, title, duration, dimensions, file_size)
+
     try:
         # Try using vcsi first (most reliable)
         layout = f"{COLS}x{ROWS}"
@@ -33,35 +51,83 @@ def generate_contact_sheet(video_path, output_path, title, duration, dimensions)
         ]
         
         print(f"[ffmpeg_utils] Running vcsi: {' '.join(cmd)}")
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        result = _run_ffmpeg(cmd, stage="vcsi", stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         
         if result.returncode == 0 and os.path.exists(output_path):
+            encode_file(output_path, CONTACT_SHEET_MAX_KB * 1024)
             print(f"Contact sheet saved using vcsi: {output_path}")
             return True
         else:
             print("vcsi failed, falling back to FFmpeg method")
-            return generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration, dimensions)
+            return generate_contact_sheet_ffmpeg_seek(video_path, output_path, title, duration, dimensions, file_size)
             
     except FileNotFoundError:
         print("vcsi not found, using FFmpeg method")
-        return generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration, dimensions)
+        return generate_contact_sheet_ffmpeg_seek(video_path, output_path, title, duration, dimensions, file_size)
+
+
+# --------------------
+# Contact Sheet using FFmpeg - seek per tile
+# --------------------
+def generate_contact_sheet_ffmpeg_seek(video_path, output_path, title, duration, dimensions, file_size=None):
+    """
+    Generate contact sheet by fast-seeking straight to each of the ROWS x COLS
+    tile timestamps, so ffmpeg only decodes around those points. Sheet time
+    depends on the number of tiles, not the length of the video.
+    """
+    total_thumbs = CONTACT_ROWS * CONTACT_COLS
+    temp_dir = tempfile.mkdtemp()
+    frame_files = []
+
+    try:
+        jobs = [
+            (i, timestamp, os.path.join(temp_dir, f"frame_{i:02d}.jpg"))
+            for i, timestamp in enumerate(_contact_sheet_timestamps(duration, total_thumbs), start=1)
+        ]
+        vf = f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease"
+
+        mode = _extraction_mode(video_path, SCREENS_MODE)
+        print(f"[ffmpeg_utils] Extracting {total_thumbs} tiles by seeking ({mode})...")
+        results = _extract_frames(video_path, jobs, vf, mode)
+        frame_files = [results[i] for i in sorted(results) if results[i]]
+        print(f"[ffmpeg_utils] Successfully extracted {len(frame_files)} frames")
+
+        if not frame_files:
+            print("No frames generated")
+            return False
+
+        return _compose_contact_sheet(frame_files, output_path, title, duration, dimensions, video_size(video_path, file_size))
+
+    except Exception as e:
+        print(f"Error generating contact sheet: {e}")
+        return False
+    finally:
+        for f in frame_files:
+            try: os.remove(f)
+            except: pass
+        try: os.rmdir(temp_dir)
+        except: pass
+
+
+def _contact_sheet_timestamps(duration, total_thumbs):
+    """Tile timestamps, evenly spaced and skipping the very start and end"""
+    safe_duration = max(duration, total_thumbs + 1)
+    interval = safe_duration / (total_thumbs + 1)
+    return [interval * i for i in range(1, total_thumbs + 1)]
 
 
 # --------------------
 # Contact Sheet using FFmpeg - FAST batch extraction
 # --------------------
-def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration, dimensions):
+def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration, dimensions, file_size=None):
     """
     Generate contact sheet using FFmpeg with FAST batch frame extraction.
     Extracts all frames in a single FFmpeg call using fps filter.
     """
-    ROWS = CONTACT_ROWS
-    COLS = CONTACT_COLS
     THUMB_W = THUMB_WIDTH
     THUMB_H = THUMB_HEIGHT
-    HEADER_H = CONTACT_HEADER_HEIGHT
 
-    total_thumbs = ROWS * COLS
+    total_thumbs = CONTACT_ROWS * CONTACT_COLS
     frame_files = []
 
     try:
@@ -78,7 +144,7 @@ def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration,
         # -ss before -i for speed, fps filter for even distribution
         cmd = [
             "ffmpeg", "-y",
-            "-i", video_path,
+            *input_args(video_path),
             "-vf", f"fps={fps},scale={THUMB_W}:{THUMB_H}:force_original_aspect_ratio=decrease",
             "-vframes", str(total_thumbs),
             "-q:v", "2",
@@ -86,7 +152,7 @@ def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration,
         ]
         
         print(f"[ffmpeg_utils] Extracting {total_thumbs} frames in one pass (fps={fps:.4f})...")
-        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        result = _run_ffmpeg(cmd, purpose="contact_sheet_fps", frames=total_thumbs)
         
         if result.returncode == 0:
             # Collect generated frames
@@ -103,54 +169,7 @@ def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration,
             print("No frames generated")
             return False
 
-        # Create contact sheet image
-        contact_width = THUMB_W * COLS
-        contact_height = (THUMB_H * ROWS) + HEADER_H
-        contact = Image.new("RGB", (contact_width, contact_height), "black")
-        draw = ImageDraw.Draw(contact)
-
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 16)
-            font_info = ImageFont.truetype("arial.ttf", 12)
-        except Exception:
-            font_title = ImageFont.load_default()
-            font_info = ImageFont.load_default()
-
-        # Calculate file size
-        file_size_bytes = os.path.getsize(video_path)
-        file_size_gb = file_size_bytes / (1024**3)
-        
-        # Header
-        draw.rectangle((0, 0, contact_width, HEADER_H), fill="white")
-        draw.text((10, 10), title or "Untitled", fill="black", font=font_title)
-        draw.text((10, 35), f"Duration: {format_duration(duration)}", fill="black", font=font_info)
-        draw.text((10, 55), f"Dimensions: {dimensions}", fill="black", font=font_info)
-        draw.text((10, 75), f"Filesize: {file_size_gb:.2f}gb", fill="black", font=font_info)
-
-        # Paste thumbnails
-        for idx, frame_path in enumerate(frame_files):
-            row = idx // COLS
-            col = idx % COLS
-            x = col * THUMB_W
-            y = HEADER_H + (row * THUMB_H)
-            
-            try:
-                with Image.open(frame_path) as thumb:
-                    # If image is smaller than thumb size, center it
-                    if thumb.size[0] < THUMB_W or thumb.size[1] < THUMB_H:
-                        bg = Image.new("RGB", (THUMB_W, THUMB_H), "black")
-                        x_offset = (THUMB_W - thumb.size[0]) // 2
-                        y_offset = (THUMB_H - thumb.size[1]) // 2
-                        bg.paste(thumb, (x_offset, y_offset))
-                        contact.paste(bg, (x, y))
-                    else:
-                        contact.paste(thumb, (x, y))
-            except Exception as e:
-                print(f"Error pasting frame {idx}: {e}")
-
-        contact.save(output_path, "JPEG", quality=95)
-        print(f"Contact sheet saved: {output_path}")
-        return True
+        return _compose_contact_sheet(frame_files, output_path, title, duration, dimensions, video_size(video_path, file_size))
 
     except Exception as e:
         print(f"Error generating contact sheet: {e}")
@@ -163,51 +182,503 @@ def generate_contact_sheet_ffmpeg_fast(video_path, output_path, title, duration,
         except: pass
 
 
+# --------------------
+# Contact Sheet compositing
+# --------------------
+def _compose_contact_sheet(frame_files, output_path, title, duration, dimensions, file_size_bytes):
+    """
+    Paste extracted tiles under a metadata header (see utils.contact_sheet)
+    and save the sheet. Tiles may be file paths or PIL images; output_path
+    may be a path or a file object such as BytesIO.
+    """
+    from utils.contact_sheet import get_compositor
+
+    with span("composite", tiles=len(frame_files)) as composite:
+        contact = get_compositor().compose(frame_files, title, duration, dimensions, file_size_bytes)
+        data = encode_image(contact, CONTACT_SHEET_MAX_KB * 1024)
+        composite.set(bytes=len(data))
+    if isinstance(output_path, str):
+        with open(output_path, "wb") as f:
+            f.write(data)
+    else:
+        output_path.write(data)
+    print(f"Contact sheet saved: {output_path if isinstance(output_path, str) else 'in memory'}")
+    return True
+
+
 # --------------------
 # Individual Screens - FAST method
 # --------------------
-def generate_individual_screens(video_path, output_dir, duration, count=12):
+def generate_individual_screens(video_path, output_dir, duration, count=12, on_screen=None, mode=None):
     """
     Generate individual screenshots quickly using -ss before -i.
     Uses offset timestamps to avoid duplicating contact sheet frames.
+    Each screen is re-encoded with the output settings (see utils.encode_utils).
+    If on_screen is given it is called as on_screen(index, path) as soon as
+    each screen file exists, so callers can start uploading it right away.
+
+    mode (defaults to SCREENS_MODE in config):
+      "sequential" - one ffmpeg process after another
+      "pool"       - up to SCREENS_WORKERS ffmpeg processes at once
+      "single"     - one ffmpeg process with a seeked input per screen
     """
-    if not os.path.exists(video_path):
+    if not video_exists(video_path):
         print(f"Video file does not exist: {video_path}")
         return []
 
+    mode = _extraction_mode(video_path, mode or SCREENS_MODE)
     os.makedirs(output_dir, exist_ok=True)
-    screen_files = []
+    jobs = [
+        (i, timestamp, os.path.join(output_dir, f"screen_{i:02d}.jpg"))
+        for i, timestamp in enumerate(_screen_timestamps(duration, count), start=1)
+    ]
+
+    encoded = {}
+
+    def on_frame(index, timestamp, output_file):
+        encoded[index] = encode_file(output_file, SCREEN_MAX_KB * 1024)
+        print(f"[ffmpeg_utils] Screen {index} generated at {timestamp:.2f}s")
+        if on_screen:
+            on_screen(index, encoded[index])
+
+    _extract_frames(video_path, jobs, "scale=1920:-1", mode, on_frame)
+
+    screen_files = [encoded[i] for i in sorted(encoded)]
+    print(f"[ffmpeg_utils] Generated {len(screen_files)} individual screens ({mode})")
+    return screen_files
+
+
+def _screen_timestamps(duration, count):
+    """Screen timestamps, offset by half an interval to avoid contact sheet frames"""
     safe_duration = max(duration, count + 1)
-    
-    # Offset by half interval to avoid contact sheet frames
     interval = safe_duration / (count + 1)
     offset = interval * 0.5
-    
-    for i in range(1, count + 1):
-        timestamp = (interval * i) + offset
-        timestamp = min(timestamp, safe_duration - 1)
-        
-        output_file = os.path.join(output_dir, f"screen_{i:02d}.jpg")
-        
-        # FAST: -ss BEFORE -i for speed
-        cmd = [
-            "ffmpeg", "-y",
-            "-ss", f"{timestamp:.3f}",
-            "-i", video_path,
+    return [min((interval * i) + offset, safe_duration - 1) for i in range(1, count + 1)]
+
+
+# --------------------
+# Shared frame plan - contact sheet + screens from one decode per timestamp
+# --------------------
+def generate_planned_media(video_path, output_dir, title, duration, dimensions, count=12, on_screen=None, mode=None,
+                           file_size=None):
+    """
+    Generate the contact sheet and individual screens from a single frame plan
+    (see utils.frame_plan). Every planned timestamp is decoded once and split
+    into the 1920px screen and/or the contact sheet tile.
+    Returns {"contact_sheet": path or None, "screens": [paths], "poster": path or None}.
+    """
+    media = {"contact_sheet": None, "screens": [], "poster": None}
+    if not video_exists(video_path):
+        print(f"Video file does not exist: {video_path}")
+        return media
+
+    mode = _extraction_mode(video_path, mode or SCREENS_MODE)
+    os.makedirs(output_dir, exist_ok=True)
+    plan = plan_scene_frames(duration, CONTACT_ROWS, CONTACT_COLS, count)
+    jobs = [(i, frame, _planned_frame_outputs(frame, output_dir)) for i, frame in enumerate(plan["frames"])]
+
+    def on_frame(frame, outputs):
+        if "screen" in outputs:
+            outputs["screen"] = encode_file(outputs["screen"], SCREEN_MAX_KB * 1024)
+            print(f"[ffmpeg_utils] Screen {frame['screen']} generated at {frame['timestamp']:.2f}s")
+            if on_screen:
+                on_screen(frame["screen"], outputs["screen"])
+
+    print(f"[ffmpeg_utils] Decoding {len(jobs)} planned frames for {CONTACT_ROWS * CONTACT_COLS} tiles + {count} screens ({mode})...")
+    if mode == "single":
+        done = _extract_planned_frames_single_pass(video_path, jobs, on_frame)
+    elif mode == "pool":
+        with ThreadPoolExecutor(max_workers=max(1, SCREENS_WORKERS)) as executor:
+            futures = {
+                executor.submit(bind(_extract_planned_frame), video_path, frame, outputs, on_frame): i
+                for i, frame, outputs in jobs
+            }
+            done = {futures[future] for future in as_completed(futures) if future.result()}
+    else:
+        done = {i for i, frame, outputs in jobs if _extract_planned_frame(video_path, frame, outputs, on_frame)}
+
+    tile_files, screens = [], {}
+    for i, frame, outputs in jobs:
+        if i not in done:
+            print(f"Frame at {frame['timestamp']:.2f}s failed")
+            continue
+        if "tile" in outputs:
+            tile_files.append(outputs["tile"])
+        if "screen" in outputs:
+            screens[frame["screen"]] = outputs["screen"]
+
+    media["screens"] = [screens[n] for n in sorted(screens)]
+    media["poster"] = screens.get(plan["poster"])
+    print(f"[ffmpeg_utils] Generated {len(media['screens'])} individual screens")
+
+    if tile_files:
+        contact_sheet_path = os.path.join(output_dir, "contactsheet" + image_extension())
+        try:
+            if _compose_contact_sheet(tile_files, contact_sheet_path, title, duration, dimensions, video_size(video_path, file_size)):
+                media["contact_sheet"] = contact_sheet_path
+        except Exception as e:
+            print(f"Error generating contact sheet: {e}")
+    return media
+
+
+def generate_planned_media_in_memory(video_path, title, duration, dimensions, count=12, on_screen=None, fingerprint=None,
+                                     file_size=None):
+    """
+    Same frame plan as generate_planned_media, but without any scratch files:
+    ffmpeg streams each decoded frame over stdout (image2pipe/ppm) into
+    Pillow, the tile is downscaled from that same frame, and screens and
+    contact sheet are encoded once (see utils.encode_utils), straight into memory.
+    on_screen(index, image_bytes) is called as each screen is ready.
+
+    With a file fingerprint (see utils.frame_cache), decoded frames are kept
+    in the on-disk frame cache, so regenerating a scene - new title, new
+    layout - recomposes from cached frames instead of running ffmpeg again.
+    Returns {"contact_sheet": bytes or None, "screens": [bytes], "poster": bytes or None}.
+    """
+    from PIL import Image
+
+    media = {"contact_sheet": None, "screens": [], "poster": None}
+    if not video_exists(video_path):
+        print(f"Video file does not exist: {video_path}")
+        return media
+
+    plan = plan_scene_frames(duration, CONTACT_ROWS, CONTACT_COLS, count)
+    frames = plan["frames"]
+    # Tiles take any cached frame (screen or tile sized) near their slot, so
+    # a layout change recomposes from the cache; screen timestamps don't
+    # depend on the layout and hit the cache exactly
+    snapped = snap_tiles_to_cached(
+        frames, cached_timestamps(fingerprint, THUMB_WIDTH), plan["tile_interval"] * FRAME_CACHE_SNAP
+    )
+    if snapped:
+        print(f"[ffmpeg_utils] {snapped} tiles snapped to cached frames")
+
+    def decode(frame):
+        width = 1920 if frame["screen"] else THUMB_WIDTH
+        # Cache file names are in milliseconds
+        cached = get_frame(fingerprint, frame["timestamp"], width, 0.001)
+
+        screen_data = None
+        if cached:
+            image = Image.open(io.BytesIO(cached[1]))
+        else:
+            image = _decode_planned_frame_image(video_path, frame)
+            if image is None:
+                print(f"Frame at {frame['timestamp']:.2f}s failed")
+                return None, None
+
+        if frame["screen"]:
+            screen_data = encode_image(image, SCREEN_MAX_KB * 1024)
+            print(f"[ffmpeg_utils] Screen {frame['screen']} generated at {frame['timestamp']:.2f}s{' (cached)' if cached else ''}")
+            if on_screen:
+                on_screen(frame["screen"], screen_data)
+
+        if not cached:
+            # The cache keeps a high quality JPEG whatever the output settings are
+            put_frame(fingerprint, frame["timestamp"], width, _encode_jpeg(image))
+
+        tile = None
+        if frame["tile"]:
+            if cached:
+                image.draft("RGB", (THUMB_WIDTH, THUMB_HEIGHT))
+            tile = image if not frame["screen"] else image.copy()
+            tile.thumbnail((THUMB_WIDTH, THUMB_HEIGHT))
+        return screen_data, tile
+
+    # Several frames can't share one stdout pipe, so "single" runs as "pool" here
+    print(f"[ffmpeg_utils] Decoding {len(frames)} planned frames in memory...")
+    if SCREENS_MODE == "sequential":
+        results = [decode(frame) for frame in frames]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, SCREENS_WORKERS)) as executor:
+            results = list(executor.map(bind(decode), frames))
+
+    screens, tiles = {}, {}
+    for frame, (screen_data, tile) in zip(frames, results):
+        if screen_data:
+            screens[frame["screen"]] = screen_data
+        if tile is not None:
+            tiles[frame["tile"]] = tile
+    tiles = [tiles[n] for n in sorted(tiles)]
+
+    media["screens"] = [screens[n] for n in sorted(screens)]
+    media["poster"] = screens.get(plan["poster"])
+    print(f"[ffmpeg_utils] Generated {len(media['screens'])} individual screens")
+
+    if tiles:
+        buffer = io.BytesIO()
+        try:
+            if _compose_contact_sheet(tiles, buffer, title, duration, dimensions, video_size(video_path, file_size)):
+                media["contact_sheet"] = buffer.getvalue()
+        except Exception as e:
+            print(f"Error generating contact sheet: {e}")
+    return media
+
+
+def _decode_planned_frame_image(video_path, frame):
+    """Decode one planned timestamp straight into a PIL image via image2pipe"""
+    from PIL import Image
+
+    if frame["screen"]:
+        vf = "scale=1920:-1"
+    else:
+        vf = f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease"
+    cmd = [
+        "ffmpeg",
+        "-ss", f"{frame['timestamp']:.3f}",
+        *input_args(video_path),
+        "-vframes", "1",
+        "-vf", vf,
+        "-f", "image2pipe",
+        "-c:v", "ppm",
+        "-"
+    ]
+    result = _run_ffmpeg(cmd, text=False, stdout=subprocess.PIPE, purpose="frame_pipe", timestamp=frame["timestamp"])
+    if result.returncode != 0 or not result.stdout:
+        return None
+    image = Image.open(io.BytesIO(result.stdout))
+    image.load()
+    return image
+
+
+def _encode_jpeg(image, quality=95):
+    """Encode a PIL image to JPEG bytes in memory"""
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _planned_frame_outputs(frame, output_dir):
+    """Output paths for a planned frame: {"screen": path, "tile": path}"""
+    outputs = {}
+    if frame["screen"]:
+        outputs["screen"] = os.path.join(output_dir, f"screen_{frame['screen']:02d}.jpg")
+    if frame["tile"]:
+        outputs["tile"] = os.path.join(output_dir, f"tile_{frame['tile']:02d}.jpg")
+    return outputs
+
+
+def _planned_frame_graph(input_index, outputs):
+    """filter_complex chain + output args that split one decoded frame into its outputs"""
+    scales = {
+        "screen": "scale=1920:-1",
+        "tile": f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease",
+    }
+    kinds = list(outputs)
+    labels = [f"{kind}{input_index}" for kind in kinds]
+    if len(kinds) == 1:
+        graph = f"[{input_index}:v]{scales[kinds[0]]}[{labels[0]}]"
+    else:
+        splits = "".join(f"[s{label}]" for label in labels)
+        graph = f"[{input_index}:v]split={len(kinds)}{splits};" + ";".join(
+            f"[s{label}]{scales[kind]}[{label}]" for kind, label in zip(kinds, labels)
+        )
+    output_args = []
+    for kind, label in zip(kinds, labels):
+        output_args += ["-map", f"[{label}]", "-vframes", "1", "-q:v", "2", outputs[kind]]
+    return graph, output_args
+
+
+def _extract_planned_frame(video_path, frame, outputs, on_frame=None):
+    """Decode one planned timestamp and write all of its outputs; returns True on success"""
+    graph, output_args = _planned_frame_graph(0, outputs)
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", f"{frame['timestamp']:.3f}",
+        *input_args(video_path),
+        "-filter_complex", graph,
+        *output_args
+    ]
+    result = _run_ffmpeg(cmd, purpose="planned_frame", timestamp=frame["timestamp"])
+    if result.returncode == 0 and all(os.path.exists(path) for path in outputs.values()):
+        if on_frame:
+            on_frame(frame, outputs)
+        return True
+    return False
+
+
+def _extract_planned_frames_single_pass(video_path, jobs, on_frame=None):
+    """Decode every planned timestamp in ONE ffmpeg process (one seeked input each)"""
+    cmd = ["ffmpeg", "-y"]
+    for _, frame, _ in jobs:
+        cmd += ["-ss", f"{frame['timestamp']:.3f}", *input_args(video_path)]
+
+    graphs, output_args = [], []
+    for input_index, (_, _, outputs) in enumerate(jobs):
+        graph, args = _planned_frame_graph(input_index, outputs)
+        graphs.append(graph)
+        output_args += args
+    cmd += ["-filter_complex", ";".join(graphs), *output_args]
+
+    result = _run_ffmpeg(cmd, purpose="planned_frames_single_pass", frames=len(jobs))
+    if result.returncode != 0:
+        print(f"Single-pass extraction failed: {result.stderr}")
+
+    done = set()
+    for i, frame, outputs in jobs:
+        if all(os.path.exists(path) for path in outputs.values()):
+            done.add(i)
+            if on_frame:
+                on_frame(frame, outputs)
+    return done
+
+
+# --------------------
+# Video input - local file or Stash stream URL
+# --------------------
+def is_remote_video(video_path):
+    """True for an HTTP(S) URL such as Stash's /scene/{id}/stream endpoint"""
+    return video_path.startswith(("http://", "https://"))
+
+
+def _extraction_mode(video_path, mode):
+    """
+    Stream URLs are always extracted in one ffmpeg process: a process per
+    timestamp would probe the stream and open its ranges again every time.
+    """
+    return "single" if is_remote_video(video_path) else mode
+
+
+def video_exists(video_path):
+    """Local files must exist; stream URLs are left for ffmpeg to open"""
+    return is_remote_video(video_path) or os.path.exists(video_path)
+
+
+def video_size(video_path, file_size=None):
+    """File size for the contact sheet header: the size Stash reports, else the local file's"""
+    if file_size:
+        return file_size
+    if is_remote_video(video_path):
+        return 0
+    return os.path.getsize(video_path)
+
+
+def input_args(video_path):
+    """
+    ffmpeg input arguments for video_path, ending with "-i <video_path>".
+    Stash stream URLs are opened with the ApiKey header as a seekable input,
+    so every -ss before -i becomes a range request near that timestamp
+    rather than a read from the start. The ranges are open-ended: ffmpeg
+    stops reading once it has its frame, but whatever is already in flight
+    is transferred too. A small probe size keeps the per-input header read
+    short. ffmpeg only takes HTTP headers on its command line, so commands
+    built from these arguments are printed through _redact.
+    """
+    if not is_remote_video(video_path):
+        return ["-i", video_path]
+    args = ["-seekable", "1", "-reconnect", "1", "-probesize", "1000000", "-analyzeduration", "1000000"]
+    if STASH_API_KEY:
+        args += ["-headers", f"ApiKey: {STASH_API_KEY}\r\n"]
+    return args + ["-i", video_path]
+
+
+# --------------------
+# Running ffmpeg
+# --------------------
+def _redact(cmd):
+    """cmd as a printable string with the -headers value (the Stash ApiKey) masked"""
+    shown = list(cmd)
+    for i, arg in enumerate(shown[:-1]):
+        if arg == "-headers":
+            shown[i + 1] = "<redacted>"
+    return " ".join(shown)
+
+
+def _run_ffmpeg(cmd, stage="ffmpeg", text=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **attrs):
+    """Run an ffmpeg (or vcsi) command as a timed metrics span; returns the CompletedProcess"""
+    with span(stage, **attrs) as run:
+        result = subprocess.run(cmd, stdout=stdout, stderr=stderr, text=text)
+        run.set(returncode=result.returncode)
+        if isinstance(result.stdout, bytes):
+            run.set(bytes=len(result.stdout))
+    return result
+
+
+# --------------------
+# Seeked frame extraction
+# --------------------
+def _extract_frames(video_path, jobs, vf, mode, on_frame=None):
+    """
+    Extract one frame per (index, timestamp, output_file) job with the given
+    video filter. on_frame(index, timestamp, output_file) is called for each
+    frame written. Returns {index: output_file or None}.
+    """
+    if mode == "single":
+        return _extract_frames_single_pass(video_path, jobs, vf, on_frame)
+    if mode == "pool":
+        return _extract_frames_pool(video_path, jobs, vf, on_frame)
+    return {
+        i: _extract_frame(video_path, i, timestamp, output_file, vf, on_frame)
+        for i, timestamp, output_file in jobs
+    }
+
+
+def _extract_frame(video_path, index, timestamp, output_file, vf, on_frame=None):
+    """Extract a single frame; returns the output path or None"""
+    # FAST: -ss BEFORE -i for speed
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", f"{timestamp:.3f}",
+        *input_args(video_path),
+        "-vframes", "1",
+        "-vf", vf,
+        "-q:v", "2",
+        output_file
+    ]
+    result = _run_ffmpeg(cmd, purpose="frame", timestamp=timestamp)
+    if result.returncode == 0 and os.path.exists(output_file):
+        if on_frame:
+            on_frame(index, timestamp, output_file)
+        return output_file
+    print(f"Frame {index} at {timestamp:.2f}s failed")
+    return None
+
+
+def _extract_frames_pool(video_path, jobs, vf, on_frame=None):
+    """Run the per-timestamp extractions with at most SCREENS_WORKERS ffmpeg processes alive"""
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, SCREENS_WORKERS)) as executor:
+        futures = {
+            executor.submit(bind(_extract_frame), video_path, i, timestamp, output_file, vf, on_frame): i
+            for i, timestamp, output_file in jobs
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def _extract_frames_single_pass(video_path, jobs, vf, on_frame=None):
+    """
+    Extract every frame in ONE ffmpeg process: each timestamp becomes its own
+    fast-seeked input, mapped to its own single-frame output.
+    """
+    cmd = ["ffmpeg", "-y"]
+    for _, timestamp, _ in jobs:
+        cmd += ["-ss", f"{timestamp:.3f}", *input_args(video_path)]
+    for input_index, (_, _, output_file) in enumerate(jobs):
+        cmd += [
+            "-map", f"{input_index}:v:0",
             "-vframes", "1",
-            "-vf", "scale=1920:-1",
+            "-vf", vf,
             "-q:v", "2",
             output_file
         ]
-        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
-        if result.returncode == 0 and os.path.exists(output_file):
-            screen_files.append(output_file)
-            print(f"[ffmpeg_utils] Screen {i} generated at {timestamp:.2f}s")
+
+    print(f"[ffmpeg_utils] Extracting {len(jobs)} frames in a single ffmpeg process...")
+    result = _run_ffmpeg(cmd, purpose="frames_single_pass", frames=len(jobs))
+    if result.returncode != 0:
+        print(f"Single-pass extraction failed: {result.stderr}")
+
+    results = {}
+    for i, timestamp, output_file in jobs:
+        if os.path.exists(output_file):
+            results[i] = output_file
+            if on_frame:
+                on_frame(i, timestamp, output_file)
         else:
-            print(f"Screen {i} failed")
-    
-    print(f"[ffmpeg_utils] Generated {len(screen_files)} individual screens")
-    return screen_files
+            results[i] = None
+            print(f"Frame {i} at {timestamp:.2f}s failed")
+    return results
 
 
 # --------------------
@@ -218,7 +689,7 @@ def generate_video_thumbnail(video_path, time_sec=30, width=300):
     Generate a single-frame thumbnail from a video using ffmpeg.
     Returns the path to the thumbnail file.
     """
-    if not os.path.exists(video_path):
+    if not video_exists(video_path):
         raise FileNotFoundError(f"Video not found: {video_path}")
 
     fd, thumb_path = tempfile.mkstemp(suffix="-thumbnail.jpg")
@@ -228,7 +699,7 @@ def generate_video_thumbnail(video_path, time_sec=30, width=300):
     cmd = [
         "ffmpeg",
         "-ss", str(time_sec),
-        "-i", video_path,
+        *input_args(video_path),
         "-vf", f"scale={width}:-1",
         "-vframes", "1",
         "-q:v", "2",
@@ -236,8 +707,8 @@ def generate_video_thumbnail(video_path, time_sec=30, width=300):
         thumb_path
     ]
 
-    print(f"[ffmpeg_utils] Running ffmpeg command: {' '.join(cmd)}")
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    print(f"[ffmpeg_utils] Running ffmpeg command: {_redact(cmd)}")
+    result = _run_ffmpeg(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, purpose="thumbnail")
 
     if not os.path.exists(thumb_path):
         raise RuntimeError(f"Thumbnail was not created: {thumb_path}")
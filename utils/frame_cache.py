@@ -0,0 +1,153 @@
+# utils/frame_cache.py
+
+import os
+import hashlib
+import threading
+
+from config import FRAME_CACHE_DIR, FRAME_CACHE_MAX_MB
+
+# Fingerprint types reported by Stash, most specific first
+FINGERPRINT_PRIORITY = ("oshash", "phash", "md5")
+
+_lock = threading.Lock()
+_total_bytes = None
+
+
+# --------------------
+# Fingerprints
+# --------------------
+def file_fingerprint(video_file, video_path=None):
+    """
+    Cache key for a video file: the Stash oshash/phash fingerprint when the
+    scene has one, otherwise a hash of path + size + mtime of the local file.
+    Returns None if neither is available.
+    """
+    fingerprints = {fp.get("type"): fp.get("value") for fp in video_file.get("fingerprints") or []}
+    for fp_type in FINGERPRINT_PRIORITY:
+        if fingerprints.get(fp_type):
+            return f"{fp_type}-{fingerprints[fp_type]}"
+
+    if video_path and os.path.exists(video_path):
+        st = os.stat(video_path)
+        key = f"{video_path}|{st.st_size}|{st.st_mtime_ns}"
+        return "file-" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return None
+
+
+# --------------------
+# Frame store
+# --------------------
+def get_frame(fingerprint, timestamp, min_width, tolerance=0.0):
+    """
+    Return (width, jpeg_bytes) of the cached frame closest to timestamp
+    (within tolerance seconds) whose width is at least min_width, or None.
+    """
+    if not FRAME_CACHE_DIR or not fingerprint:
+        return None
+
+    scene_dir = os.path.join(FRAME_CACHE_DIR, fingerprint)
+    best = None
+    try:
+        widths = [int(w) for w in os.listdir(scene_dir) if w.isdigit() and int(w) >= min_width]
+    except FileNotFoundError:
+        return None
+
+    target_ms = int(round(timestamp * 1000))
+    tolerance_ms = int(tolerance * 1000)
+    for width in sorted(widths):
+        width_dir = os.path.join(scene_dir, str(width))
+        for name in os.listdir(width_dir):
+            if not name.endswith(".jpg"):
+                continue
+            distance = abs(int(name[:-4]) - target_ms)
+            if distance <= tolerance_ms and (best is None or distance < best[0]):
+                best = (distance, width, os.path.join(width_dir, name))
+        if best and best[0] == 0:
+            break
+
+    if not best:
+        return None
+    try:
+        with open(best[2], "rb") as f:
+            data = f.read()
+        os.utime(best[2])  # mark as recently used for LRU eviction
+        return best[1], data
+    except OSError:
+        return None
+
+
+def cached_timestamps(fingerprint, min_width):
+    """Timestamps (seconds) that have a cached frame at least min_width wide"""
+    if not FRAME_CACHE_DIR or not fingerprint:
+        return []
+    scene_dir = os.path.join(FRAME_CACHE_DIR, fingerprint)
+    timestamps = set()
+    try:
+        for width in os.listdir(scene_dir):
+            if width.isdigit() and int(width) >= min_width:
+                for name in os.listdir(os.path.join(scene_dir, width)):
+                    if name.endswith(".jpg") and name[:-4].isdigit():
+                        timestamps.add(int(name[:-4]) / 1000)
+    except OSError:
+        return []
+    return sorted(timestamps)
+
+
+def put_frame(fingerprint, timestamp, width, jpeg_bytes):
+    """Store a decoded frame (JPEG bytes) and evict least recently used frames over budget"""
+    global _total_bytes
+    if not FRAME_CACHE_DIR or not fingerprint:
+        return
+
+    width_dir = os.path.join(FRAME_CACHE_DIR, fingerprint, str(width))
+    path = os.path.join(width_dir, f"{int(round(timestamp * 1000))}.jpg")
+    try:
+        os.makedirs(width_dir, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(jpeg_bytes)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[frame_cache] Failed to store frame: {e}")
+        return
+
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = sum(size for _, size, _ in _cached_files())
+        else:
+            _total_bytes += len(jpeg_bytes) - previous
+        if _total_bytes > FRAME_CACHE_MAX_MB * 1024 * 1024:
+            _evict()
+
+
+def _cached_files():
+    """Yield (path, size, last_used) for every cached frame"""
+    for dirpath, _, filenames in os.walk(FRAME_CACHE_DIR):
+        for name in filenames:
+            if name.endswith(".jpg"):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+
+def _evict():
+    """Delete least recently used frames until the cache is at 90% of its budget (lock held)"""
+    global _total_bytes
+    target = FRAME_CACHE_MAX_MB * 1024 * 1024 * 0.9
+    files = sorted(_cached_files(), key=lambda x: x[2])
+    _total_bytes = sum(size for _, size, _ in files)
+    removed = 0
+    for path, size, _ in files:
+        if _total_bytes <= target:
+            break
+        try:
+            os.remove(path)
+            _total_bytes -= size
+            removed += 1
+        except OSError:
+            pass
+    print(f"[frame_cache] Evicted {removed} frames, {_total_bytes / (1024**2):.0f} MB cached")
@@ -0,0 +1,80 @@
+# utils/frame_plan.py
+
+from config import CONTACT_ROWS, CONTACT_COLS
+
+
+# --------------------
+# Scene frame plan
+# --------------------
+def plan_scene_frames(duration, rows=CONTACT_ROWS, cols=CONTACT_COLS, screen_count=12):
+    """
+    Work out every timestamp a scene needs up front.
+
+    Screens are spread evenly over the video on their own, so their
+    timestamps don't move when the contact sheet layout changes (and stay
+    cached). Tiles are spread evenly too; a tile that has a screen within
+    half a tile interval takes that screen's frame, so each timestamp is
+    decoded once and can feed both a tile and a screen. Returns:
+
+        {
+            "frames": [{"timestamp": t, "tile": n or None, "screen": n or None}, ...],
+            "poster": screen number to use as poster fallback (or None),
+            "tile_interval": seconds between tiles,
+        }
+
+    Frames are in timestamp order; tile and screen numbers start at 1.
+    """
+    tile_count = rows * cols
+    safe_duration = max(duration, max(tile_count, screen_count) + 1)
+    tile_interval = safe_duration / (tile_count + 1)
+
+    frames = [
+        {"timestamp": timestamp, "tile": None, "screen": number}
+        for number, timestamp in enumerate(_spaced(safe_duration, screen_count), start=1)
+    ]
+    shared = []
+    for number, timestamp in enumerate(_spaced(safe_duration, tile_count), start=1):
+        free = [frame for frame in frames if frame["tile"] is None]
+        nearest = min(free, key=lambda frame: abs(frame["timestamp"] - timestamp), default=None)
+        if nearest and abs(nearest["timestamp"] - timestamp) <= tile_interval / 2:
+            nearest["tile"] = number
+        else:
+            shared.append({"timestamp": timestamp, "tile": number, "screen": None})
+    frames = sorted(frames + shared, key=lambda frame: frame["timestamp"])
+
+    poster = (screen_count + 1) // 2 if screen_count else None
+    return {"frames": frames, "poster": poster, "tile_interval": tile_interval}
+
+
+def snap_tiles_to_cached(frames, cached_timestamps, tolerance):
+    """
+    Move tile-only frames onto the nearest cached timestamp within tolerance
+    seconds, each cached frame used once, so a layout change recomposes from
+    frames that are already decoded. Screen frames keep their timestamps.
+    Frames are re-sorted and tiles renumbered in timestamp order.
+    Returns the number of tiles snapped.
+    """
+    # Frames that keep their timestamp already own the cached frame there
+    taken = {round(frame["timestamp"], 3) for frame in frames if frame["screen"]}
+    available = [timestamp for timestamp in sorted(cached_timestamps) if round(timestamp, 3) not in taken]
+    snapped = 0
+    for frame in frames:
+        if frame["screen"] or not available:
+            continue
+        nearest = min(available, key=lambda timestamp: abs(timestamp - frame["timestamp"]))
+        if abs(nearest - frame["timestamp"]) <= tolerance:
+            frame["timestamp"] = nearest
+            available.remove(nearest)
+            snapped += 1
+    # Keep the sheet chronological in case two snapped tiles crossed over
+    frames.sort(key=lambda frame: frame["timestamp"])
+    tiled = [frame for frame in frames if frame["tile"]]
+    for number, frame in enumerate(tiled, start=1):
+        frame["tile"] = number
+    return snapped
+
+
+def _spaced(duration, count):
+    """`count` evenly spaced timestamps, skipping the very start and end"""
+    interval = duration / (count + 1)
+    return [interval * i for i in range(1, count + 1)]
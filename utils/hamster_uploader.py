@@ -0,0 +1,123 @@
+# utils/hamster_uploader.py
+
+import os
+import time
+import random
+import threading
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import UPLOAD_WORKERS, UPLOAD_RETRIES, UPLOAD_BACKOFF_SECONDS
+from utils.upload_ledger import content_hash, lookup_upload, record_upload
+from utils.metrics import span, bind
+
+# Responses worth retrying: rate limiting and server-side hiccups
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+_uploaders = {}
+_uploaders_lock = threading.Lock()
+
+
+class TransientUploadError(Exception):
+    """Upload failed in a way that is worth retrying"""
+
+
+# --------------------
+# Uploader
+# --------------------
+class HamsterUploader:
+    """
+    HamsterImg uploader with a keep-alive connection pool, a bounded number
+    of parallel uploads and retries with exponential backoff on transient
+    errors. Identical bytes are answered from the upload ledger.
+    """
+
+    def __init__(self, api_key, upload_url, workers=UPLOAD_WORKERS, retries=UPLOAD_RETRIES, backoff=UPLOAD_BACKOFF_SECONDS):
+        self.api_key = api_key
+        self.upload_url = upload_url
+        self.retries = retries
+        self.backoff = backoff
+
+        workers = max(1, workers)
+        self.session = requests.Session()
+        self.session.headers.update({"X-API-Key": api_key})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hamster-upload")
+
+    def submit(self, image_data, filename="image.jpg"):
+        """Queue an upload on the pool; returns a Future resolving to the URL or None"""
+        return self.executor.submit(bind(self.upload), image_data, filename)
+
+    def submit_file(self, file_path):
+        """Queue an upload of a file on disk; returns a Future resolving to the URL or None"""
+        return self.executor.submit(bind(self.upload_file), file_path)
+
+    def upload_many(self, items):
+        """Upload (image_data, filename) pairs in parallel; URLs come back in the same order"""
+        return [future.result() for future in [self.submit(data, name) for data, name in items]]
+
+    def upload(self, image_data, filename="image.jpg"):
+        """Upload image bytes and return the URL (None on failure)"""
+        digest = content_hash(image_data)
+        url = lookup_upload(digest)
+        if url:
+            print(f"[hamster_uploader] {filename} already uploaded: {url}")
+            return url
+
+        url = self._post(image_data, filename)
+        record_upload(digest, url, len(image_data))
+        return url
+
+    def upload_file(self, file_path):
+        """Upload a file on disk and return the URL (None on failure)"""
+        try:
+            with open(file_path, "rb") as f:
+                image_data = f.read()
+        except OSError as e:
+            print(f"[hamster_uploader] Upload error: {e}")
+            return None
+        return self.upload(image_data, os.path.basename(file_path))
+
+    def _post(self, image_data, filename):
+        mime_type = mimetypes.guess_type(filename)[0] or "image/jpeg"
+        for attempt in range(self.retries + 1):
+            try:
+                files = {"source": (filename, image_data, mime_type)}
+                with span("upload", filename=filename, bytes=len(image_data), attempt=attempt + 1) as request:
+                    r = self.session.post(self.upload_url, files=files, timeout=30)
+                    request.set(status=r.status_code)
+                if r.status_code in TRANSIENT_STATUS:
+                    raise TransientUploadError(f"HTTP {r.status_code}")
+                r.raise_for_status()
+
+                result = r.json()
+                if result.get("status_code") == 200:
+                    return result["image"]["url"]
+                print(f"[hamster_uploader] Upload rejected for {filename}: {result.get('status_txt') or result}")
+                return None
+
+            except (TransientUploadError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.retries:
+                    print(f"[hamster_uploader] Upload error for {filename} after {attempt + 1} attempts: {e}")
+                    return None
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"[hamster_uploader] {filename}: {e}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+            except Exception as e:
+                print(f"[hamster_uploader] Upload error for {filename}: {e}")
+                return None
+
+
+def get_uploader(api_key, upload_url):
+    """Shared uploader per API key/URL, so connections stay warm across scenes"""
+    with _uploaders_lock:
+        uploader = _uploaders.get((api_key, upload_url))
+        if uploader is None:
+            uploader = HamsterUploader(api_key, upload_url)
+            _uploaders[(api_key, upload_url)] = uploader
+        return uploader
@@ -0,0 +1,194 @@
+# utils/image_cache.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import requests
+
+from config import IMAGE_CACHE_DIR, IMAGE_CACHE_MEMORY_MB, IMAGE_CACHE_MAX_MB, IMAGE_CACHE_FRESH_SECONDS
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # url -> entry, most recently used last
+_memory_bytes = 0
+_disk_bytes = None
+
+
+# --------------------
+# Cached download
+# --------------------
+def fetch_cached_image(session, url, headers=None):
+    """
+    GET an image through a two-level cache: an in-memory LRU in front of an
+    on-disk store. Entries younger than IMAGE_CACHE_FRESH_SECONDS are served
+    without any request; older ones are revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged image costs one 304.
+    If revalidation fails (Stash unreachable or a 5xx) the stale copy is
+    served. Returns the image bytes, or None if the URL did not return an
+    image. Raises requests exceptions on transport/HTTP errors with nothing
+    cached.
+    """
+    entry = _get_entry(url)
+    if entry and time.time() - entry["checked_at"] < IMAGE_CACHE_FRESH_SECONDS:
+        return entry["data"]
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = session.get(url, headers=request_headers, timeout=10)
+    except requests.exceptions.RequestException as e:
+        if not entry:
+            raise
+        print(f"[image_cache] Stash unreachable ({e}), using cached image")
+        return entry["data"]
+    if entry and response.status_code >= 500:
+        print(f"[image_cache] Stash returned {response.status_code}, using cached image")
+        return entry["data"]
+    if entry and response.status_code == 304:
+        entry["checked_at"] = time.time()
+        _put_entry(url, entry, write_data=False)
+        return entry["data"]
+
+    response.raise_for_status()
+    content_type = response.headers.get("Content-Type", "")
+    if "image" not in content_type:
+        print(f"[image_cache] Warning: URL did not return an image. Content-Type: {content_type}")
+        return None
+
+    _put_entry(url, {
+        "data": response.content,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    })
+    return response.content
+
+
+def is_fresh(url):
+    """True if the image would be served from the cache without any request"""
+    entry = _get_entry(url)
+    return bool(entry) and time.time() - entry["checked_at"] < IMAGE_CACHE_FRESH_SECONDS
+
+
+# --------------------
+# Memory + disk levels
+# --------------------
+def _disk_paths(url):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    base = os.path.join(IMAGE_CACHE_DIR, key[:2], key)
+    return base + ".img", base + ".json"
+
+
+def _get_entry(url):
+    with _lock:
+        entry = _memory.get(url)
+        if entry:
+            _memory.move_to_end(url)
+            return entry
+
+    if not IMAGE_CACHE_DIR:
+        return None
+    data_path, meta_path = _disk_paths(url)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        with open(data_path, "rb") as f:
+            entry["data"] = f.read()
+        os.utime(data_path)  # mark as recently used for LRU eviction
+    except (OSError, ValueError):
+        return None
+    _remember(url, entry)
+    return entry
+
+
+def _put_entry(url, entry, write_data=True):
+    global _disk_bytes
+    _remember(url, entry)
+    if not IMAGE_CACHE_DIR:
+        return
+    data_path, meta_path = _disk_paths(url)
+    previous = 0
+    try:
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        # A revalidated entry may have been evicted from disk meanwhile
+        write_data = write_data or not os.path.exists(data_path)
+        if write_data:
+            previous = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            with open(data_path, "wb") as f:
+                f.write(entry["data"])
+        else:
+            os.utime(data_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in entry.items() if k != "data"}, f)
+    except OSError as e:
+        print(f"[image_cache] Failed to store image: {e}")
+        return
+
+    if not write_data:
+        return
+    with _lock:
+        if _disk_bytes is None:
+            _disk_bytes = sum(size for _, size, _ in _cached_files())
+        else:
+            _disk_bytes += len(entry["data"]) - previous
+        if _disk_bytes > IMAGE_CACHE_MAX_MB * 1024 * 1024:
+            _evict()
+
+
+def _cached_files():
+    """Yield (data_path, size, last_used) for every image on disk"""
+    for dirpath, _, filenames in os.walk(IMAGE_CACHE_DIR):
+        for name in filenames:
+            if name.endswith(".img"):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+
+def _evict():
+    """Delete least recently used images until the disk level is at 90% of its budget (lock held)"""
+    global _disk_bytes
+    target = IMAGE_CACHE_MAX_MB * 1024 * 1024 * 0.9
+    files = sorted(_cached_files(), key=lambda x: x[2])
+    _disk_bytes = sum(size for _, size, _ in files)
+    removed = 0
+    for path, size, _ in files:
+        if _disk_bytes <= target:
+            break
+        try:
+            os.remove(path)
+            _disk_bytes -= size
+            removed += 1
+        except OSError:
+            continue
+        try:
+            os.remove(path[:-len(".img")] + ".json")
+        except OSError:
+            pass
+    print(f"[image_cache] Evicted {removed} images, {_disk_bytes / (1024**2):.0f} MB cached")
+
+
+def _remember(url, entry):
+    """Insert into the memory LRU, evicting the oldest entries over budget"""
+    global _memory_bytes
+    budget = IMAGE_CACHE_MEMORY_MB * 1024 * 1024
+    with _lock:
+        previous = _memory.pop(url, None)
+        if previous:
+            _memory_bytes -= len(previous["data"])
+        _memory[url] = entry
+        _memory_bytes += len(entry["data"])
+        while _memory_bytes > budget and len(_memory) > 1:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted["data"])
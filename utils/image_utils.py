@@ -1,10 +1,9 @@
 # utils/image_utils.py
 
-import os
-import io
-import requests
-from PIL import Image, ImageTk
 from config import STASH_BASE_URL
+from utils.image_cache import fetch_cached_image
+from utils.hamster_uploader import get_uploader
+from utils.metrics import span
 
 # --------------------
 # Session will be passed in or created externally
@@ -13,6 +12,8 @@ from config import STASH_BASE_URL
 def download_stash_image(image_url, session, api_key=None):
     """
     Download an image from Stash, including API key authentication if needed.
+    Goes through the image cache (utils.image_cache), so repeat lookups of the
+    same studio/performer cost a 304 or nothing.
     Returns bytes of the image.
     """
     headers = {}
@@ -20,13 +21,10 @@ def download_stash_image(image_url, session, api_key=None):
         headers["ApiKey"] = api_key  # Stash uses ApiKey header
 
     try:
-        response = session.get(image_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        content_type = response.headers.get("Content-Type", "")
-        if "image" not in content_type:
-            print(f"[image_utils] Warning: URL did not return an image. Content-Type: {content_type}")
-            return None
-        return response.content
+        with span("image_download", url=image_url) as download:
+            data = fetch_cached_image(session, image_url, headers)
+            download.set(bytes=len(data or b""))
+        return data
     except Exception as e:
         print(f"[image_utils] Failed to download image: {e}")
         return None
@@ -35,41 +33,12 @@ def download_stash_image(image_url, session, api_key=None):
 
 def upload_file_to_hamster(file_path, api_key: str, upload_url: str):
     """Upload a file to HamsterImg and return the URL"""
-    try:
-        with open(file_path, 'rb') as f:
-            files = {'source': (os.path.basename(file_path), f, 'image/jpeg')}
-            headers = {'X-API-Key': api_key}
-
-            r = requests.post(upload_url, headers=headers, files=files, timeout=30)
-            r.raise_for_status()
-
-            result = r.json()
-            if result.get('status_code') == 200:
-                return result['image']['url']
-            return None
-
-    except Exception as e:
-        print(f"[image_utils] Upload error: {e}")
-        return None
+    return get_uploader(api_key, upload_url).upload_file(file_path)
 
 
 def upload_image_data_to_hamster(image_data, api_key: str, upload_url: str, filename="image.jpg"):
     """Upload image data to HamsterImg and return the URL"""
-    try:
-        files = {'source': (filename, image_data, 'image/jpeg')}
-        headers = {'X-API-Key': api_key}
-
-        r = requests.post(upload_url, headers=headers, files=files, timeout=30)
-        r.raise_for_status()
-
-        result = r.json()
-        if result.get('status_code') == 200:
-            return result['image']['url']
-        return None
-
-    except Exception as e:
-        print(f"[image_utils] Upload error: {e}")
-        return None
+    return get_uploader(api_key, upload_url).upload(image_data, filename)
 
 
 def build_image_url(image_path, base_url=None):
@@ -98,29 +67,3 @@ def format_duration(seconds):
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
     return f"{minutes:02d}:{secs:02d}"
 
-
-# --------------------
-# Image Display
-# --------------------
-def display_image(image_data, label_widget, max_width=280, max_height=280):
-    """Display image in a Tkinter label, resizing to max dimensions"""
-    try:
-        if not image_data:
-            label_widget.configure(image="", text="No image data")
-            return False
-
-        img = Image.open(io.BytesIO(image_data))
-        img.thumbnail(
-            (max_width, max_height),
-            Image.Resampling.LANCZOS if hasattr(Image, "Resampling") else Image.ANTIALIAS
-        )
-
-        photo = ImageTk.PhotoImage(img)
-        label_widget.configure(image=photo, text="")
-        label_widget.image = photo  # Keep reference to avoid GC
-        return True
-
-    except Exception as e:
-        print(f"Image display error: {e}")
-        label_widget.configure(image="", text="Failed to display")
-        return False
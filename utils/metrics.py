@@ -0,0 +1,190 @@
+# utils/metrics.py
+
+import json
+import time
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from config import METRICS_JSONL_PATH
+
+# Upper bounds (seconds) of the per-stage latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Span attributes that nested spans inherit, so a shared-pool upload or ffmpeg
+# run can still be traced back to its scene
+CONTEXT_ATTRS = ("scene_id",)
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> {"buckets": [counts], "count", "sum", "errors"}
+_jsonl_file = None
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("metrics_span", default=None)
+
+
+# --------------------
+# Spans
+# --------------------
+class Span:
+    """A timed stage; attributes (scene_id, bytes, returncode, ...) can be added while it runs"""
+
+    def __init__(self, stage, attrs, parent=None):
+        self.stage = stage
+        self.attrs = attrs
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.context = dict(parent.context) if parent else {}
+        self.context.update({key: attrs[key] for key in CONTEXT_ATTRS if key in attrs})
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Time the enclosed block as one span of `stage`:
+
+        with span("upload", filename=name, bytes=len(data)) as s:
+            ...
+            s.set(status=r.status_code)
+
+    Exceptions are recorded as an `error` attribute and re-raised.
+    Spans opened inside another one (on this thread, or on a pool thread the
+    work was handed to through bind()) record its span_id as parent_id and
+    inherit its CONTEXT_ATTRS.
+    """
+    current = Span(stage, attrs, _current_span.get())
+    token = _current_span.set(current)
+    started_at = time.time()
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        record(stage, time.perf_counter() - started, started_at, {
+            **current.context,
+            "span_id": current.span_id,
+            "parent_id": current.parent_id,
+            **current.attrs,
+        })
+
+
+def bind(func):
+    """
+    Wrap func so it runs inside the span that is open now, wherever it is
+    called from. Use it when handing work to a thread pool:
+
+        executor.submit(bind(upload), data)
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time; pools run
+        # the same wrapper concurrently, so each call gets its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+def record(stage, duration, started_at=None, attrs=None):
+    """Add a finished span to the histogram and the JSON lines export"""
+    global _jsonl_file
+    attrs = attrs or {}
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "errors": 0}
+            _histograms[stage] = histogram
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                histogram["buckets"][i] += 1
+        histogram["count"] += 1
+        histogram["sum"] += duration
+        if attrs.get("error"):
+            histogram["errors"] += 1
+
+        if METRICS_JSONL_PATH:
+            line = {
+                "ts": round(started_at or time.time() - duration, 6),
+                "stage": stage,
+                "duration_s": round(duration, 6),
+                "thread": threading.current_thread().name,
+                **attrs,
+            }
+            try:
+                if _jsonl_file is None:
+                    _jsonl_file = open(METRICS_JSONL_PATH, "a", encoding="utf-8")
+                _jsonl_file.write(json.dumps(line, default=str) + "\n")
+                _jsonl_file.flush()
+            except OSError as e:
+                print(f"[metrics] Failed to write {METRICS_JSONL_PATH}: {e}")
+
+
+# --------------------
+# Export
+# --------------------
+def stage_stats():
+    """Snapshot of the per-stage histograms: {stage: {"count", "sum", "errors", "buckets": {le: count}}}"""
+    with _lock:
+        return {
+            stage: {
+                "count": h["count"],
+                "sum": h["sum"],
+                "errors": h["errors"],
+                "buckets": dict(zip(BUCKETS, h["buckets"])),
+            }
+            for stage, h in _histograms.items()
+        }
+
+
+def render_prometheus():
+    """The per-stage histograms in the Prometheus text exposition format"""
+    lines = [
+        "# HELP stashsync_stage_duration_seconds Time spent per pipeline stage",
+        "# TYPE stashsync_stage_duration_seconds histogram",
+    ]
+    stats = stage_stats()
+    for stage, h in sorted(stats.items()):
+        for bound, count in h["buckets"].items():
+            lines.append(f'stashsync_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'stashsync_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h["count"]}')
+        lines.append(f'stashsync_stage_duration_seconds_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+        lines.append(f'stashsync_stage_duration_seconds_count{{stage="{stage}"}} {h["count"]}')
+    lines += [
+        "# HELP stashsync_stage_errors_total Spans that ended with an exception",
+        "# TYPE stashsync_stage_errors_total counter",
+    ]
+    for stage, h in sorted(stats.items()):
+        lines.append(f'stashsync_stage_errors_total{{stage="{stage}"}} {h["errors"]}')
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve /metrics for scraping from a daemon thread; returns the server"""
+    # http.server is slow to import and only needed here
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[metrics] Serving http://{host}:{server.server_address[1]}/metrics")
+    return server
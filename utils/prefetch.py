@@ -0,0 +1,88 @@
+# utils/prefetch.py
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PREFETCH_DEPTH, PREFETCH_BACKWARD, PREFETCH_MAX_KBPS
+from utils.scene_utils import fetch_scene
+from utils.image_utils import download_stash_image, build_image_url
+from utils.image_cache import is_fresh
+
+
+# --------------------
+# Neighbouring scene prefetch
+# --------------------
+class ScenePrefetcher:
+    """
+    After scene N is looked up, warms the scene and image caches for
+    N+1 .. N+PREFETCH_DEPTH (and N-1 .. N-PREFETCH_DEPTH with
+    PREFETCH_BACKWARD) on a single background thread, throttled to
+    PREFETCH_MAX_KBPS. A newer schedule() supersedes the previous one, and
+    nothing is fetched while paused (e.g. during generate/upload).
+    """
+
+    def __init__(self, stash_session, query, graphql_url, depth=PREFETCH_DEPTH, backward=PREFETCH_BACKWARD, max_kbps=PREFETCH_MAX_KBPS):
+        self.stash_session = stash_session
+        self.query = query
+        self.graphql_url = graphql_url
+        self.depth = depth
+        self.backward = backward
+        self.max_kbps = max_kbps
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._generation = 0
+        self._paused = threading.Event()
+
+    def schedule(self, scene_id):
+        """Prefetch the neighbours of scene_id, dropping any older prefetch"""
+        if self.depth <= 0 or not str(scene_id).isdigit():
+            return
+        self._generation += 1
+        scene_id = int(scene_id)
+        ids = [scene_id + n for n in range(1, self.depth + 1)]
+        if self.backward:
+            ids += [scene_id - n for n in range(1, self.depth + 1) if scene_id - n > 0]
+        self._executor.submit(self._prefetch, ids, self._generation)
+
+    def pause(self):
+        """Stop prefetching (the request in flight, if any, still completes)"""
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def _active(self, generation):
+        return generation == self._generation and not self._paused.is_set()
+
+    def _prefetch(self, ids, generation):
+        for scene_id in ids:
+            if not self._active(generation):
+                return
+            try:
+                scene = fetch_scene(self.stash_session, scene_id, self.query, self.graphql_url)
+            except Exception as e:
+                print(f"[prefetch] Scene {scene_id} failed: {e}")
+                continue
+            if not scene:
+                continue
+
+            image_paths = [(scene.get("studio") or {}).get("image_path")]
+            image_paths += [p.get("image_path") for p in scene.get("performers", [])]
+            for image_path in filter(None, image_paths):
+                if not self._active(generation):
+                    return
+                url = build_image_url(image_path)
+                if is_fresh(url):
+                    continue
+                started = time.monotonic()
+                data = download_stash_image(url, self.stash_session)
+                self._throttle(len(data or b""), time.monotonic() - started)
+            print(f"[prefetch] Scene {scene_id} warmed")
+
+    def _throttle(self, num_bytes, elapsed):
+        """Sleep long enough to keep prefetch traffic under max_kbps"""
+        if self.max_kbps > 0:
+            delay = num_bytes / (self.max_kbps * 1024) - elapsed
+            if delay > 0:
+                time.sleep(delay)
@@ -0,0 +1,106 @@
+# utils/profiling.py
+
+import io
+import os
+import re
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+_state = {"report_dir": None}
+_profiler_lock = threading.Lock()
+_count_lock = threading.Lock()
+_report_count = 0
+
+
+# --------------------
+# Profiling mode (--profile)
+# --------------------
+def enable_profiling(report_dir, frames=25):
+    """Turn on profiling for the rest of the session; reports go to report_dir"""
+    os.makedirs(report_dir, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _state["report_dir"] = report_dir
+    print(f"[profiling] Writing CPU and memory reports to {os.path.abspath(report_dir)}")
+
+
+def profiling_enabled():
+    return _state["report_dir"] is not None
+
+
+@contextmanager
+def profiled(name):
+    """
+    With profiling enabled, run the block under cProfile and tracemalloc and
+    write two reports to the report directory:
+      <n>-<name>.prof - raw cProfile stats (snakeviz, pstats, ...)
+      <n>-<name>.txt  - top functions by cumulative time, allocations made
+                        during the block, and the largest live allocations
+                        (what long sessions are holding on to)
+    cProfile only sees the calling thread, and only one run can be profiled
+    at a time; a run that overlaps another one gets the memory report only.
+    Without profiling enabled this does nothing.
+    """
+    if not profiling_enabled():
+        yield
+        return
+
+    profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    if profiler:
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler (e.g. a debugger) is already active
+            _profiler_lock.release()
+            profiler = None
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiler_lock.release()
+        elapsed = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        try:
+            _write_report(name, elapsed, profiler, before, after)
+        except OSError as e:
+            print(f"[profiling] Failed to write report for {name}: {e}")
+
+
+def _write_report(name, elapsed, profiler, before, after):
+    global _report_count
+    with _count_lock:
+        _report_count += 1
+        number = _report_count
+    base = os.path.join(_state["report_dir"], f"{number:04d}-{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}")
+
+    out = io.StringIO()
+    current, peak = tracemalloc.get_traced_memory()
+    out.write(f"{name}: {elapsed:.3f}s wall\n")
+    out.write(f"Traced memory: {current / 1024**2:.1f} MB current, {peak / 1024**2:.1f} MB peak\n\n")
+
+    if profiler:
+        profiler.dump_stats(base + ".prof")
+        out.write("==== CPU: top functions by cumulative time ====\n")
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+    else:
+        out.write("==== CPU: not profiled (another run was being profiled) ====\n\n")
+
+    out.write("==== Memory: allocated during this run (net) ====\n")
+    for stat in after.compare_to(before, "lineno")[:25]:
+        out.write(f"{stat}\n")
+
+    out.write("\n==== Memory: largest live allocations ====\n")
+    for stat in after.statistics("traceback")[:10]:
+        out.write(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+        for line in stat.traceback.format()[-6:]:
+            out.write(f"    {line}\n")
+
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+    print(f"[profiling] {name}: report saved to {base}.txt")
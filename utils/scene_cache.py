@@ -0,0 +1,157 @@
+# utils/scene_cache.py
+
+import copy
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from config import SCENE_CACHE_TTL_SECONDS, SCENE_CACHE_PATH, SCENE_CACHE_MEMORY_ENTRIES
+
+_lock = threading.Lock()
+_scenes = OrderedDict()  # scene_id -> (checked_at, scene), most recently used last
+_initialized = False
+
+
+# --------------------
+# Scene cache storage
+# --------------------
+def _connect():
+    """Open the scene cache database, creating the table on first use"""
+    global _initialized
+    conn = sqlite3.connect(SCENE_CACHE_PATH, timeout=30)
+    if not _initialized:
+        with _lock:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scenes ("
+                " scene_id TEXT PRIMARY KEY,"
+                " updated_at TEXT,"
+                " data TEXT NOT NULL,"
+                " checked_at REAL)"
+            )
+            conn.commit()
+            _initialized = True
+    return conn
+
+
+def _remember(scene_id, cached):
+    """Insert into the memory LRU, evicting the oldest scenes over SCENE_CACHE_MEMORY_ENTRIES (lock held)"""
+    _scenes[scene_id] = cached
+    _scenes.move_to_end(scene_id)
+    while len(_scenes) > max(1, SCENE_CACHE_MEMORY_ENTRIES):
+        _scenes.popitem(last=False)
+
+
+def _load(scene_id):
+    """(checked_at, scene) for a scene, from memory or disk, or None"""
+    scene_id = str(scene_id)
+    with _lock:
+        cached = _scenes.get(scene_id)
+        if cached:
+            _scenes.move_to_end(scene_id)
+    if cached or not SCENE_CACHE_PATH:
+        return cached
+
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT checked_at, data FROM scenes WHERE scene_id = ?", (scene_id,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[scene_cache] Lookup failed: {e}")
+        return None
+    if not row:
+        return None
+
+    cached = (row[0] or 0, json.loads(row[1]))
+    with _lock:
+        _remember(scene_id, cached)
+    return cached
+
+
+# --------------------
+# Scene cache
+# --------------------
+def get_cached_scene(scene_id):
+    """Return a copy of a cached findScene result checked less than SCENE_CACHE_TTL_SECONDS ago, or None"""
+    cached = _load(scene_id)
+    if not cached or time.time() - cached[0] > SCENE_CACHE_TTL_SECONDS:
+        return None
+    # Callers add URLs and scene_id to the dict they get, so never hand out the cached one
+    return copy.deepcopy(cached[1])
+
+
+def get_stale_scene(scene_id):
+    """Return a copy of a cached findScene result however old it is, or None"""
+    cached = _load(scene_id)
+    return copy.deepcopy(cached[1]) if cached else None
+
+
+def put_cached_scene(scene_id, scene):
+    """Remember a findScene result"""
+    put_cached_scenes([(scene_id, scene)])
+
+
+def put_cached_scenes(scenes):
+    """Remember many (scene_id, scene) findScene results in one transaction"""
+    now = time.time()
+    rows = []
+    with _lock:
+        for scene_id, scene in scenes:
+            _remember(str(scene_id), (now, copy.deepcopy(scene)))
+            rows.append((str(scene_id), scene.get("updated_at"), json.dumps(scene), now))
+    if not SCENE_CACHE_PATH or not rows:
+        return
+    try:
+        conn = _connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scenes (scene_id, updated_at, data, checked_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[scene_cache] Failed to store scenes: {e}")
+
+
+def mark_scene_checked(scene_id):
+    """Stash confirmed the cached scene is unchanged; restart its TTL"""
+    scene_id = str(scene_id)
+    now = time.time()
+    with _lock:
+        cached = _scenes.get(scene_id)
+        if cached:
+            _remember(scene_id, (now, cached[1]))
+    if not SCENE_CACHE_PATH:
+        return
+    try:
+        conn = _connect()
+        try:
+            conn.execute("UPDATE scenes SET checked_at = ? WHERE scene_id = ?", (now, scene_id))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[scene_cache] Failed to update scene: {e}")
+
+
+def forget_cached_scene(scene_id):
+    """Drop a scene that no longer exists in Stash"""
+    scene_id = str(scene_id)
+    with _lock:
+        _scenes.pop(scene_id, None)
+    if not SCENE_CACHE_PATH:
+        return
+    try:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM scenes WHERE scene_id = ?", (scene_id,))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[scene_cache] Failed to forget scene: {e}")
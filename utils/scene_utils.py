@@ -0,0 +1,199 @@
+# utils/scene_utils.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from config import STASH_GRAPHQL_URL, IMAGE_DOWNLOAD_WORKERS, GRAPHQL_BATCH_SIZE, GRAPHQL_PAGE_SIZE, SCENE_REVALIDATE_TIMEOUT
+from graphql.queries import FIND_SCENE_QUERY, FIND_SCENES_QUERY, SCENE_UPDATED_AT_QUERY, build_find_scenes_by_id_query
+from utils.image_utils import download_stash_image, build_image_url
+from utils.metrics import span, bind
+from utils.scene_cache import (
+    get_cached_scene, get_stale_scene, put_cached_scene, put_cached_scenes, mark_scene_checked, forget_cached_scene
+)
+
+
+# --------------------
+# Scene Lookup (headless)
+# --------------------
+def fetch_scene(stash_session, scene_id, query=FIND_SCENE_QUERY, graphql_url=STASH_GRAPHQL_URL, use_cache=True):
+    """
+    Fetch a single scene from Stash via GraphQL.
+    Recently fetched (or prefetched) scenes are served from the scene cache.
+    Older cached scenes are revalidated by asking Stash only for updated_at,
+    and are served as-is when Stash can't be reached.
+    Returns the findScene dict, or None if the scene does not exist.
+    Raises RuntimeError on GraphQL errors and requests exceptions on transport
+    errors when there is no cached copy to fall back on.
+    """
+    stale = None
+    if use_cache:
+        scene = get_cached_scene(scene_id)
+        if scene:
+            return scene
+
+        stale = get_stale_scene(scene_id)
+        if stale:
+            try:
+                current = _post_graphql(
+                    stash_session, SCENE_UPDATED_AT_QUERY, {"id": str(scene_id)}, graphql_url,
+                    timeout=SCENE_REVALIDATE_TIMEOUT
+                ).get("findScene")
+            except requests.exceptions.RequestException as e:
+                print(f"[scene_utils] Stash unreachable ({e}), using cached scene {scene_id}")
+                return stale
+            if current and stale.get("updated_at") and current.get("updated_at") == stale["updated_at"]:
+                mark_scene_checked(scene_id)
+                return stale
+
+    try:
+        scene = _post_graphql(stash_session, query, {"id": str(scene_id)}, graphql_url).get("findScene")
+    except requests.exceptions.RequestException as e:
+        if not stale:
+            raise
+        print(f"[scene_utils] Stash unreachable ({e}), using cached scene {scene_id}")
+        return stale
+
+    if scene:
+        put_cached_scene(scene_id, scene)
+    else:
+        forget_cached_scene(scene_id)
+    return scene
+
+
+def _post_graphql(stash_session, query, variables, graphql_url, timeout=10, partial=False):
+    """
+    POST a GraphQL query and return its data dict; raises RuntimeError on GraphQL errors.
+    With partial=True, errors tied to a top-level field (one alias of a
+    batched query) don't raise; the result is (data, {field: message}) and
+    the other fields can still be used.
+    """
+    operation = query.split("(", 1)[0].split()[-1]
+    with span("graphql", operation=operation) as request:
+        r = stash_session.post(graphql_url, json={"query": query, "variables": variables}, timeout=timeout)
+        request.set(status=r.status_code, bytes=len(r.content))
+        r.raise_for_status()
+        data = r.json()
+    errors = data.get("errors") or []
+    if partial and data.get("data") is not None and all(error.get("path") for error in errors):
+        return data["data"], {error["path"][0]: error.get("message", "GraphQL error") for error in errors}
+    if errors:
+        raise RuntimeError(errors[0]["message"])
+    return data.get("data") or {}
+
+
+# --------------------
+# Batched scene fetching
+# --------------------
+def iter_scenes_by_ids(stash_session, scene_ids, chunk_size=GRAPHQL_BATCH_SIZE, graphql_url=STASH_GRAPHQL_URL):
+    """
+    Yield (scene_id, scene or None, error or None) for every ID, fetching
+    chunk_size scenes per request with aliased findScene fields. Only one
+    chunk is held in memory at a time.
+    An error on one alias only fails that scene. If the whole request fails,
+    the chunk is retried one findScene at a time, so each ID still gets its
+    own result or error.
+    """
+    scene_ids = list(scene_ids)
+    for start in range(0, len(scene_ids), chunk_size):
+        chunk = scene_ids[start:start + chunk_size]
+        query = build_find_scenes_by_id_query(len(chunk))
+        variables = {f"id{i}": str(scene_id) for i, scene_id in enumerate(chunk)}
+        try:
+            data, errors = _post_graphql(stash_session, query, variables, graphql_url, timeout=30, partial=True)
+        except (RuntimeError, ValueError, requests.exceptions.RequestException) as e:
+            print(f"[scene_utils] Batched lookup of {len(chunk)} scenes failed ({e}), fetching them one by one")
+            yield from _fetch_scenes_one_by_one(stash_session, chunk, graphql_url)
+            continue
+        scenes = [(scene_id, data.get(f"s{i}"), errors.get(f"s{i}")) for i, scene_id in enumerate(chunk)]
+        put_cached_scenes([(scene_id, scene) for scene_id, scene, _ in scenes if scene])
+        yield from scenes
+
+
+def _fetch_scenes_one_by_one(stash_session, scene_ids, graphql_url):
+    for scene_id in scene_ids:
+        try:
+            yield scene_id, fetch_scene(stash_session, scene_id, graphql_url=graphql_url), None
+        except Exception as e:
+            yield scene_id, None, str(e)
+
+
+def fetch_scenes(stash_session, scene_ids, chunk_size=GRAPHQL_BATCH_SIZE, graphql_url=STASH_GRAPHQL_URL):
+    """
+    Fetch many scenes in as few requests as possible; returns {scene_id: scene or None}
+    (None also for scenes whose lookup failed)
+    """
+    return {
+        scene_id: scene
+        for scene_id, scene, _ in iter_scenes_by_ids(stash_session, scene_ids, chunk_size, graphql_url)
+    }
+
+
+def iter_find_scenes(stash_session, scene_filter=None, per_page=GRAPHQL_PAGE_SIZE, graphql_url=STASH_GRAPHQL_URL):
+    """
+    Stream every scene matching a Stash SceneFilterType through paginated
+    findScenes requests, sorted by ID. Only one page is held in memory.
+    """
+    page = 1
+    while True:
+        variables = {
+            "filter": {"page": page, "per_page": per_page, "sort": "id", "direction": "ASC"},
+            "scene_filter": scene_filter or {},
+        }
+        result = _post_graphql(stash_session, FIND_SCENES_QUERY, variables, graphql_url, timeout=30).get("findScenes") or {}
+        scenes = result.get("scenes") or []
+        put_cached_scenes([(scene["id"], scene) for scene in scenes])
+        yield from scenes
+        if len(scenes) < per_page or page * per_page >= result.get("count", 0):
+            return
+        page += 1
+
+
+def download_scene_images(scene, stash_session, on_image=None):
+    """
+    Download the studio and performer images for a scene concurrently
+    (IMAGE_DOWNLOAD_WORKERS at a time over the pooled Stash session).
+    If on_image is given it is called as on_image(kind, index, entry) the
+    moment each download finishes, where kind is "studio" or "performer",
+    index is the performer's position in scene["performers"] and entry is
+    the image dict or None if the download failed.
+    Returns (studio_image_data, performer_images_data) in the same shape the
+    GUI lookup fills in, so both can be handed to generate_and_upload.
+    """
+    jobs = []
+    studio = scene.get("studio")
+    if studio and studio.get("image_path"):
+        jobs.append(("studio", 0, None, studio["image_path"]))
+    for index, performer in enumerate(scene.get("performers", [])):
+        if performer.get("image_path"):
+            jobs.append(("performer", index, performer["name"], performer["image_path"]))
+
+    def download(job):
+        kind, index, name, image_path = job
+        url = build_image_url(image_path)
+        img_data = download_stash_image(url, stash_session)
+        entry = None
+        if img_data:
+            entry = {"url": url, "data": img_data}
+            if name is not None:
+                entry = {"name": name, **entry}
+        if on_image:
+            on_image(kind, index, entry)
+        return entry
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(IMAGE_DOWNLOAD_WORKERS, len(jobs)))) as executor:
+            results = list(executor.map(bind(download), jobs))
+    else:
+        results = []
+
+    studio_image_data = {}
+    performer_images_data = []
+    for (kind, _, _, _), entry in zip(jobs, results):
+        if not entry:
+            continue
+        if kind == "studio":
+            studio_image_data.update(entry)
+        else:
+            performer_images_data.append(entry)
+
+    return studio_image_data, performer_images_data
@@ -1,7 +1,12 @@
 import requests
+from requests.adapters import HTTPAdapter
 from config import STASH_API_KEY
 
 def create_stash_session():
     session = requests.Session()
     session.headers.update({"ApiKey": STASH_API_KEY, "Content-Type": "application/json"})
+    # Keep enough pooled keep-alive connections for concurrent image downloads
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     return session
@@ -0,0 +1,108 @@
+# utils/upload_ledger.py
+
+import time
+import sqlite3
+import hashlib
+import threading
+
+import requests
+from config import UPLOAD_LEDGER_PATH, UPLOAD_LEDGER_VERIFY
+
+_lock = threading.Lock()
+_initialized = False
+
+
+# --------------------
+# Ledger storage
+# --------------------
+def _connect():
+    """Open the ledger database, creating the table on first use"""
+    global _initialized
+    conn = sqlite3.connect(UPLOAD_LEDGER_PATH, timeout=30)
+    if not _initialized:
+        with _lock:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " content_hash TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " size INTEGER,"
+                " uploaded_at REAL)"
+            )
+            conn.commit()
+            _initialized = True
+    return conn
+
+
+def content_hash(image_data):
+    """SHA-256 of the uploaded bytes"""
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def lookup_upload(digest, verify=None):
+    """
+    Return the Hamster URL previously recorded for this content hash, or None.
+    With verify (defaults to UPLOAD_LEDGER_VERIFY) the old URL is checked with a
+    HEAD request first and forgotten if it no longer serves an image.
+    """
+    if not UPLOAD_LEDGER_PATH:
+        return None
+    verify = UPLOAD_LEDGER_VERIFY if verify is None else verify
+
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT url FROM uploads WHERE content_hash = ?", (digest,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[upload_ledger] Lookup failed: {e}")
+        return None
+
+    if not row:
+        return None
+    url = row[0]
+    if verify and not _url_is_alive(url):
+        print(f"[upload_ledger] Stored URL is gone, re-uploading: {url}")
+        forget_upload(digest)
+        return None
+    return url
+
+
+def record_upload(digest, url, size):
+    """Remember the Hamster URL returned for this content hash"""
+    if not UPLOAD_LEDGER_PATH or not url:
+        return
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads (content_hash, url, size, uploaded_at) VALUES (?, ?, ?, ?)",
+                (digest, url, size, time.time())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[upload_ledger] Failed to record upload: {e}")
+
+
+def forget_upload(digest):
+    """Drop a ledger entry"""
+    try:
+        conn = _connect()
+        try:
+            conn.execute("DELETE FROM uploads WHERE content_hash = ?", (digest,))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[upload_ledger] Failed to forget upload: {e}")
+
+
+def _url_is_alive(url):
+    """True if the URL still answers with an image"""
+    try:
+        r = requests.head(url, timeout=10, allow_redirects=True)
+        return r.status_code == 200 and "image" in r.headers.get("Content-Type", "")
+    except requests.exceptions.RequestException:
+        return False
@@ -1,19 +1,26 @@
 # utils/upload_utils.py
 
 import os
+import shutil
 import tempfile
-import requests
-from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
 from utils.ffmpeg_utils import generate_contact_sheet, generate_individual_screens
-from utils.image_utils import upload_file_to_hamster, upload_image_data_to_hamster, download_stash_image
-from paths.path_mapper import load_path_mappings, map_path
-from config import STASH_API_KEY
+from utils.ffmpeg_utils import generate_planned_media, generate_planned_media_in_memory, is_remote_video
+from utils.hamster_uploader import get_uploader
+from utils.frame_cache import file_fingerprint
+from utils.encode_utils import image_extension, normalize_upload_image
+from utils.metrics import span, bind
+from utils.profiling import profiled
+from paths.path_mapper import get_path_mapper
+from config import STASH_API_KEY, FRAME_PLAN, IN_MEMORY_FRAMES, STUDIO_IMAGE_MAX_WIDTH, PERFORMER_IMAGE_MAX_WIDTH
+from config import REMOTE_EXTRACTION
 
-def generate_and_upload(
+
+def process_scene_media(
     current_scene_data,
     studio_image_data,
     performer_images_data,
-    title_var,
+    title,
     hamster_api_key,
     hamster_upload_url,
     stash_session,
@@ -22,60 +29,229 @@ def generate_and_upload(
     """
     Generates contact sheet and screenshots, uploads to Hamster,
     stores URLs in current_scene_data, and returns a list of BBCode image links.
+    Raises FileNotFoundError if the scene has no reachable video file
+    (neither mapped locally nor, with REMOTE_EXTRACTION, over Stash's stream).
     """
+    scene_id = current_scene_data.get("id") or current_scene_data.get("scene_id")
+    with span("generate_upload", scene_id=scene_id), profiled(f"generate-{scene_id}"):
+        return _process_scene_media(
+            current_scene_data,
+            studio_image_data,
+            performer_images_data,
+            title,
+            hamster_api_key,
+            hamster_upload_url,
+            stash_session,
+            stash_url
+        )
+
+
+def _process_scene_media(
+    current_scene_data,
+    studio_image_data,
+    performer_images_data,
+    title,
+    hamster_api_key,
+    hamster_upload_url,
+    stash_session,
+    stash_url
+):
     if not current_scene_data.get("files"):
-        messagebox.showerror("Error", "No video file found")
-        return []
+        raise FileNotFoundError("No video file found")
 
     video_file = current_scene_data['files'][0]
-    linux_path = video_file.get('path')
-    path_mappings = load_path_mappings()
-    video_path = map_path(linux_path, path_mappings)
-
-    if not os.path.exists(video_path):
-        messagebox.showerror("Error", f"Video file not found: {video_path}")
-        return []
-
-    temp_dir = tempfile.mkdtemp()
-    contact_sheet_path = os.path.join(temp_dir, "contactsheet.jpg")
-    screens_dir = os.path.join(temp_dir, "screens")
-    os.makedirs(screens_dir, exist_ok=True)
-
-    # --------------------
-    # Generate contact sheet
-    # --------------------
-    generate_contact_sheet(
-        video_path,
-        contact_sheet_path,
-        title_var.get(),
-        video_file.get("duration", 0),
-        f"{video_file.get('width',0)}x{video_file.get('height',0)}"
-    )
-
-    # --------------------
-    # Generate individual screens
-    # --------------------
-    screen_files = generate_individual_screens(video_path, screens_dir, video_file.get("duration",0))
-
-    # --------------------
-    # Upload studio image
-    # --------------------
-    if studio_image_data.get("data"):
-        studio_image_data["url"] = upload_image_data_to_hamster(
-            studio_image_data["data"], hamster_api_key, hamster_upload_url, "studio.jpg"
-        )
+    video_path = _resolve_video_source(current_scene_data, video_file, stash_url)
+    file_size = video_file.get("size")
 
-    # --------------------
-    # Upload performer images
-    # --------------------
-    for perf in performer_images_data:
-        perf["url"] = upload_image_data_to_hamster(
-            perf["data"], hamster_api_key, hamster_upload_url, f"{perf['name']}.jpg"
-        )
+    duration = video_file.get("duration", 0)
+    # In memory is a process per frame; stream URLs go through the single-process file path
+    in_memory = FRAME_PLAN == "shared" and IN_MEMORY_FRAMES and not is_remote_video(video_path)
+    # Scratch files only exist on the file-based paths
+    temp_dir = None if in_memory else tempfile.mkdtemp()
+
+    try:
+        # Uploads go through the pooled uploader so network time overlaps ffmpeg time;
+        # the background pool runs the slow non-upload steps alongside
+        uploader = get_uploader(hamster_api_key, hamster_upload_url)
+        with ThreadPoolExecutor(max_workers=2) as background:
+            # --------------------
+            # Upload studio, performer and poster images right away
+            # --------------------
+            studio_future = None
+            if studio_image_data.get("data"):
+                studio_future = _submit_normalized(uploader, studio_image_data["data"], "studio", STUDIO_IMAGE_MAX_WIDTH)
+
+            performer_futures = [
+                _submit_normalized(uploader, perf["data"], perf["name"], PERFORMER_IMAGE_MAX_WIDTH)
+                for perf in performer_images_data
+            ]
+
+            poster_future = background.submit(bind(_download_and_upload_poster), current_scene_data, stash_url, stash_session, uploader)
+
+            screen_futures = {}
+
+            def on_screen(index, screen):
+                screen_futures[index] = _submit_artifact(uploader, screen, f"screen_{index:02d}{image_extension()}")
+
+            poster_fallback = None
+            if FRAME_PLAN == "shared":
+                # --------------------
+                # One decode per timestamp feeds both screens and contact sheet tiles;
+                # each screen is uploaded as soon as it exists
+                # --------------------
+                dimensions = f"{video_file.get('width',0)}x{video_file.get('height',0)}"
+                if in_memory:
+                    media = generate_planned_media_in_memory(
+                        video_path, title, duration, dimensions,
+                        on_screen=on_screen,
+                        fingerprint=file_fingerprint(video_file, video_path),
+                        file_size=file_size
+                    )
+                else:
+                    media = generate_planned_media(
+                        video_path, temp_dir, title, duration, dimensions, on_screen=on_screen, file_size=file_size
+                    )
+                contact_future = None
+                if media["contact_sheet"]:
+                    contact_future = _submit_artifact(uploader, media["contact_sheet"], "contactsheet" + image_extension())
+                poster_fallback = media["poster"]
+            else:
+                # --------------------
+                # Generate + upload contact sheet in the background
+                # --------------------
+                contact_future = background.submit(
+                    bind(_generate_and_upload_contact_sheet),
+                    video_path,
+                    os.path.join(temp_dir, "contactsheet" + image_extension()),
+                    title,
+                    duration,
+                    f"{video_file.get('width',0)}x{video_file.get('height',0)}",
+                    file_size,
+                    uploader
+                )
+
+                # --------------------
+                # Generate individual screens, uploading each one as soon as it exists
+                # --------------------
+                generate_individual_screens(video_path, os.path.join(temp_dir, "screens"), duration, on_screen=on_screen)
+
+            # --------------------
+            # Collect results in BBCode order
+            # --------------------
+            if studio_future:
+                studio_image_data["url"] = studio_future.result()
+            for perf, future in zip(performer_images_data, performer_futures):
+                perf["url"] = future.result()
+            poster_url = poster_future.result()
+            contact_url = contact_future.result() if contact_future else None
+            screen_urls = [screen_futures[i].result() for i in sorted(screen_futures)]
+
+        # Stash had no usable poster: fall back to the planned poster frame
+        if not poster_url and poster_fallback:
+            poster_url = _submit_artifact(uploader, poster_fallback, "poster" + image_extension()).result()
+            print(f"[upload_utils] Poster uploaded from planned frame: {poster_url}")
+
+        # --------------------
+        # Store URLs in scene data
+        # --------------------
+        current_scene_data['contact_sheet_url'] = contact_url
+        current_scene_data['screenshot_urls'] = [url for url in screen_urls if url]
+        current_scene_data['poster_url'] = poster_url
+
+        # --------------------
+        # Build BBCode
+        # --------------------
+        bbcode_lines = []
+
+        if studio_image_data.get("url"):
+            bbcode_lines.append(f"[img]{studio_image_data['url']}[/img]")
+
+        for perf in performer_images_data:
+            if perf.get("url"):
+                bbcode_lines.append(f"[img]{perf['url']}[/img]")
+
+        if poster_url:
+            bbcode_lines.append(f"[img]{poster_url}[/img]")
+
+        if contact_url:
+            bbcode_lines.append(f"[img]{contact_url}[/img]")
+
+        for url in screen_urls:
+            if url:
+                bbcode_lines.append(f"[img]{url}[/img]")
 
-    # --------------------
-    # Poster / Cover
-    # --------------------
+        return bbcode_lines
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# --------------------
+# Pipeline steps
+# --------------------
+def _resolve_video_source(current_scene_data, video_file, stash_url):
+    """
+    Where ffmpeg reads the scene from: the mapped local path, or Stash's
+    /scene/{id}/stream URL (see REMOTE_EXTRACTION) when that isn't reachable.
+    Raises FileNotFoundError if neither is available.
+    """
+    scene_id = current_scene_data.get("id") or current_scene_data.get("scene_id")
+    stream_url = f"{stash_url}/scene/{scene_id}/stream" if scene_id and stash_url else None
+
+    if REMOTE_EXTRACTION == "always" and stream_url:
+        print(f"[upload_utils] Reading video from Stash stream: {stream_url}")
+        return stream_url
+
+    video_path = get_path_mapper().map(video_file.get('path'))
+    if video_path and os.path.exists(video_path):
+        return video_path
+
+    if REMOTE_EXTRACTION in ("fallback", "always") and stream_url:
+        print(f"[upload_utils] Video file not found locally ({video_path}), reading from Stash stream: {stream_url}")
+        return stream_url
+    raise FileNotFoundError(f"Video file not found: {video_path}")
+
+
+def _submit_artifact(uploader, artifact, filename):
+    """Queue an upload of an image given either as a file path or as in-memory bytes"""
+    if isinstance(artifact, (bytes, bytearray)):
+        return uploader.submit(artifact, filename)
+    return uploader.submit_file(artifact)
+
+
+def _submit_normalized(uploader, image_data, name, max_width):
+    """
+    Queue an upload of a studio/performer image, shrunk to max_width first.
+    The shrinking runs on the upload pool too, so it overlaps ffmpeg instead
+    of delaying it.
+    """
+    return uploader.executor.submit(bind(_normalize_and_upload), uploader, image_data, name, max_width)
+
+
+def _normalize_and_upload(uploader, image_data, name, max_width):
+    """Shrink a studio/performer image to max_width and upload it; returns the Hamster URL or None"""
+    original_size = len(image_data)
+    if max_width:
+        image_data, extension = normalize_upload_image(image_data, max_width)
+    else:
+        extension = None
+    if extension:
+        print(f"[upload_utils] {name}: {original_size // 1024} KB -> {len(image_data) // 1024} KB")
+    return uploader.upload(image_data, f"{name}{extension or '.jpg'}")
+
+
+def _generate_and_upload_contact_sheet(video_path, output_path, title, duration, dimensions, file_size, uploader):
+    """Generate the contact sheet and upload it; returns the Hamster URL or None"""
+    if not generate_contact_sheet(video_path, output_path, title, duration, dimensions, file_size):
+        return None
+    return uploader.upload_file(output_path)
+
+
+def _download_and_upload_poster(current_scene_data, stash_url, stash_session, uploader):
+    """
+    Download the scene poster from Stash over the pooled session and upload
+    it; returns the Hamster URL or None
+    """
     poster_url = None
 
     screenshot_path = None
@@ -95,8 +271,8 @@ def generate_and_upload(
     elif current_scene_data.get('cover_image'):
         screenshot_path = current_scene_data['cover_image']
         print(f"[upload_utils] Found screenshot in cover_image: {screenshot_path}")
-    elif current_scene_data.get('scene_id'):
-        scene_id = current_scene_data['scene_id']
+    elif current_scene_data.get('id') or current_scene_data.get('scene_id'):
+        scene_id = current_scene_data.get('id') or current_scene_data['scene_id']
         screenshot_path = f"{stash_url}/scene/{scene_id}/screenshot"
         print(f"[upload_utils] Using screenshot from scene ID: {screenshot_path}")
 
@@ -104,14 +280,14 @@ def generate_and_upload(
     if screenshot_path:
         try:
             headers = {'ApiKey': STASH_API_KEY}
-            resp = requests.get(screenshot_path, headers=headers, timeout=10)
+            with span("image_download", url=screenshot_path, kind="poster") as download:
+                resp = stash_session.get(screenshot_path, headers=headers, timeout=10)
+                download.set(status=resp.status_code, bytes=len(resp.content))
             content_type = resp.headers.get("Content-Type", "")
             if "image" in content_type:
                 poster_data = resp.content
                 print(f"[image_utils] Downloaded poster data ({len(poster_data)} bytes)")
-                poster_url = upload_image_data_to_hamster(
-                    poster_data, hamster_api_key, hamster_upload_url, "poster.jpg"
-                )
+                poster_url = uploader.upload(poster_data, "poster.jpg")
                 print(f"[upload_utils] Poster uploaded: {poster_url}")
             else:
                 print(f"[image_utils] Warning: URL did not return an image. Content-Type: {content_type}")
@@ -123,41 +299,4 @@ def generate_and_upload(
     if not poster_url:
         print(f"[upload_utils] Warning: No poster uploaded.")
 
-    # --------------------
-    # Upload contact sheet and individual screens
-    # --------------------
-    contact_url = upload_file_to_hamster(contact_sheet_path, hamster_api_key, hamster_upload_url)
-    screen_urls = [upload_file_to_hamster(f, hamster_api_key, hamster_upload_url) for f in screen_files]
-
-    # --------------------
-    # Store URLs in scene data
-    # --------------------
-    current_scene_data['contact_sheet_url'] = contact_url
-    current_scene_data['screenshot_urls'] = [url for url in screen_urls if url]
-    current_scene_data['poster_url'] = poster_url
-
-    # --------------------
-    # Build BBCode
-    # --------------------
-    bbcode_lines = []
-
-    if studio_image_data.get("url"):
-        bbcode_lines.append(f"[img]{studio_image_data['url']}[/img]")
-
-    for perf in performer_images_data:
-        if perf.get("url"):
-            bbcode_lines.append(f"[img]{perf['url']}[/img]")
-
-    if poster_url:
-        bbcode_lines.append(f"[img]{poster_url}[/img]")
-
-    if contact_url:
-        bbcode_lines.append(f"[img]{contact_url}[/img]")
-
-    for url in screen_urls:
-        if url:
-            bbcode_lines.append(f"[img]{url}[/img]")
-
-    messagebox.showinfo("Success", "Images generated and uploaded successfully!")
-
-    return bbcode_lines
+    return poster_url